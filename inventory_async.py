@@ -0,0 +1,151 @@
+# inventory_async.py - asyncio facade over inventory_manager
+
+import asyncio, logging
+from concurrent.futures import ThreadPoolExecutor
+
+import inventory_manager as im
+import inventory_metrics as metrics
+from inventory_pool import ConnectionPool
+
+# Get logger
+logger = logging.getLogger("InventoryApp.async")
+
+
+class AsyncSession:
+    """One pooled connection and one transaction shared by several awaited calls.
+
+    Calls are serialized, run on the facade's executor, and committed (or rolled back on
+    error) when the `async with` block exits.
+    """
+
+    def __init__(self, inventory):
+        self._inventory = inventory
+        self._conn = None
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        # Hold a connection slot for the whole session
+        await self._inventory._slots.acquire()
+        try:
+            self._conn = await self._inventory._run(self._inventory._pool.checkout)
+        except BaseException:
+            self._inventory._slots.release()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        conn, self._conn = self._conn, None
+        inventory = self._inventory
+
+        def finish():
+            try:
+                if exc_type is None:
+                    conn.commit()
+                else:
+                    logger.error("Error during async session on %s: %r.", inventory.db_name, exc)
+                    logger.error("Database rollback commenced.")
+                    conn.rollback()
+            finally:
+                inventory._pool.checkin(conn)
+
+        try:
+            await inventory._run(finish)
+        finally:
+            inventory._slots.release()
+
+    async def call(self, func, *args, **kwargs):
+        # Run func(cursor, *args, **kwargs) on this session's connection
+        if self._conn is None:
+            raise RuntimeError("AsyncSession is not open.")
+        conn = self._conn
+        async with self._lock:
+            return await self._inventory._run(lambda: func(metrics.new_cursor(conn), *args, **kwargs))
+
+    async def add_item(self, name, quantity, price):
+        return await self.call(im.add_item, name, quantity, price)
+
+    async def view_item(self, item_id):
+        return await self.call(im.get_item, item_id)
+
+    async def update_inventory(self, item_id, new_qty, new_price):
+        return await self.call(im.update_inventory, item_id, new_qty, new_price)
+
+    async def delete_item(self, item_id):
+        return await self.call(im.delete_item, item_id)
+
+
+class AsyncInventory:
+    """Async versions of the inventory_manager CRUD functions.
+
+    Blocking SQLite work runs on a dedicated thread pool sized to a bounded connection pool,
+    so the event loop never waits on the database. One-shot calls run in their own short
+    transaction; use session() to group several calls into one transaction.
+    """
+
+    def __init__(self, db_name, max_connections=4, profile="throughput", **pool_options):
+        self.db_name = db_name
+        self._pool = ConnectionPool(db_name, max_size=max_connections, profile=profile, **pool_options)
+        self._executor = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix="inventory-async")
+        # Callers wait here, on the event loop, rather than parking executor threads in
+        # pool.checkout() where they could starve open sessions of threads
+        self._slots = asyncio.Semaphore(max_connections)
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _call_blocking(self, func, args, kwargs):
+        # Runs on an executor thread: one pooled connection, one transaction
+        with self._pool.connection() as conn:
+            try:
+                result = func(metrics.new_cursor(conn), *args, **kwargs)
+                conn.commit()
+                return result
+            except Exception:
+                conn.rollback()
+                raise
+
+    async def call(self, func, *args, **kwargs):
+        """Run func(cursor, *args, **kwargs) in its own transaction off the event loop."""
+        async with self._slots:
+            return await self._run(self._call_blocking, func, args, kwargs)
+
+    async def create_inv_tables(self, **options):
+        return await self.call(im.create_inv_tables, **options)
+
+    async def add_item(self, name, quantity, price):
+        return await self.call(im.add_item, name, quantity, price)
+
+    async def view_item(self, item_id):
+        # Returns the InventoryItem (or None) instead of only logging it
+        return await self.call(im.get_item, item_id)
+
+    async def update_inventory(self, item_id, new_qty, new_price):
+        return await self.call(im.update_inventory, item_id, new_qty, new_price)
+
+    async def delete_item(self, item_id):
+        return await self.call(im.delete_item, item_id)
+
+    async def iter_inventory(self, page_size=im.DEFAULT_PAGE_SIZE, after_id=None):
+        """Async iterator over all items; each page is fetched on the executor."""
+        while True:
+            page = await self.call(im.get_inventory_page, page_size, after_id)
+            for item in page:
+                yield item
+            if len(page) < page_size:
+                return
+            after_id = page[-1].id
+
+    def session(self):
+        return AsyncSession(self)
+
+    async def close(self):
+        # Let running calls finish, then release the threads and connections
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown, True)
+        self._pool.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
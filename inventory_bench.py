@@ -0,0 +1,396 @@
+# inventory_bench.py - benchmarks for inventory_manager
+
+import argparse, asyncio, json, os, platform, random, sqlite3, sys, tempfile, threading, time, logging
+
+try:
+    import resource
+except ImportError:  # Windows has no resource module
+    resource = None
+
+import inventory_manager as im
+import inventory_async
+
+# Get logger
+logger = logging.getLogger("InventoryApp.bench")
+
+
+# CRUD operations measured by run_suite, in execution order. delete_item removes the rows
+# that add_item created so every size keeps its row count between runs.
+CRUD_OPERATIONS = ("add_item", "view_item", "view_inventory", "update_inventory", "delete_item")
+
+
+def _seed(db_name, rows, profile=None):
+    with im.managed_db_session(db_name, profile=profile) as cursor:
+        im.create_inv_tables(cursor)
+        im.add_items(cursor, (("item-%d" % i, i % 500, round(i % 1000 * 0.25, 2)) for i in range(rows)))
+
+
+def _seeded_database(workdir, rows):
+    # Synthetic data is deterministic, so a seeded file is reused across runs
+    db_name = os.path.join(workdir, "seed_%d.db" % rows)
+    if os.path.exists(db_name):
+        with im.managed_db_session(db_name) as cursor:
+            cursor.execute("SELECT COUNT(*) FROM inventory")
+            if cursor.fetchone()[0] == rows:
+                return db_name
+        os.remove(db_name)
+    logger.info("Seeding %s rows into %s...", rows, db_name)
+    _seed(db_name, rows, "bulk-load")
+    return db_name
+
+
+def peak_rss_kb():
+    # ru_maxrss is kilobytes on Linux, bytes on macOS; None where it is unavailable
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _percentile(sorted_values, pct):
+    # Nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class OperationFailed(Exception):
+    """A benchmarked call reported failure through its return value instead of raising."""
+
+
+def _operation_runner(op, cursor, rows, rng, created):
+    # Returns a zero-argument callable performing one `op`. add_item and update_inventory
+    # log sqlite3 errors and return False, so a False result counts as an error, not an op.
+    if op == "add_item":
+        def run():
+            if not im.add_item(cursor, "bench-item", rng.randint(0, 500), 1.0):
+                raise OperationFailed(op)
+            created.append(cursor.lastrowid)
+            cursor.connection.commit()
+    elif op == "view_item":
+        def run():
+            im.view_item(cursor, rng.randint(1, rows))
+    elif op == "view_inventory":
+        def run():
+            im.view_inventory(cursor)
+    elif op == "update_inventory":
+        def run():
+            # Ids up to `rows` always exist, so False means the update failed
+            if not im.update_inventory(cursor, rng.randint(1, rows), rng.randint(0, 500), rng.random() * 100):
+                raise OperationFailed(op)
+            cursor.connection.commit()
+    elif op == "delete_item":
+        def run():
+            if created:
+                im.delete_item(cursor, created.pop())
+                cursor.connection.commit()
+    else:
+        raise ValueError("Unknown operation: %r" % (op,))
+    return run
+
+
+def bench_operation(db_name, op, rows, operations, threads=1, profile="throughput", created=None, seed=0):
+    """Run `operations` calls of `op` split across `threads` threads, each with its own connection.
+
+    Returns throughput and p50/p99 latency. `created` maps thread index to the ids inserted
+    by add_item, which delete_item consumes.
+    """
+    created = created if created is not None else {}
+    per_thread = max(1, operations // threads)
+    latencies = [None] * threads
+    errors = [0] * threads
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(index):
+        conn = sqlite3.connect(db_name)
+        im.apply_storage_profile(conn, profile)
+        cursor = conn.cursor()
+        run = _operation_runner(op, cursor, rows, random.Random(seed * 1000 + index), created.setdefault(index, []))
+        timings = []
+        barrier.wait()
+        for _ in range(per_thread):
+            started = time.perf_counter()
+            try:
+                run()
+            except (sqlite3.Error, OperationFailed):
+                conn.rollback()
+                errors[index] += 1
+                continue
+            timings.append(time.perf_counter() - started)
+        conn.close()
+        latencies[index] = timings
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in workers:
+        t.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    merged = sorted(value for timings in latencies for value in timings)
+    return {
+        "op": op,
+        "size": rows,
+        "threads": threads,
+        "ops": len(merged),
+        "errors": sum(errors),
+        "ops_per_sec": round(len(merged) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(_percentile(merged, 50) * 1000, 4),
+        "p99_ms": round(_percentile(merged, 99) * 1000, 4),
+    }
+
+
+def run_suite(sizes=(10000,), threads=(1, 4), operations=2000, scan_operations=3,
+              profile="throughput", workdir=None, ops=CRUD_OPERATIONS):
+    """Benchmark every CRUD path for each inventory size and thread count.
+
+    Full-table view_inventory runs `scan_operations` times instead of `operations`.
+    Returns a JSON-serializable report.
+    """
+    workdir = workdir or os.path.join(tempfile.gettempdir(), "inv_bench")
+    os.makedirs(workdir, exist_ok=True)
+    results = []
+    for rows in sizes:
+        db_name = _seeded_database(workdir, rows)
+        for thread_count in threads:
+            created = {}
+            for op in ops:
+                count = scan_operations if op == "view_inventory" else operations
+                count = max(count, thread_count)
+                result = bench_operation(db_name, op, rows, count, thread_count, profile, created)
+                logger.info("%s", result)
+                results.append(result)
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "profile": profile,
+            "operations": operations,
+        },
+        "results": results,
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+
+def compare_reports(baseline, candidate, threshold=0.10):
+    """Compare two run_suite reports matched on (size, threads, op).
+
+    A row regresses when throughput drops, or p99 latency rises, by more than `threshold`.
+    """
+    def index(report):
+        return {(r["size"], r["threads"], r["op"]): r for r in report["results"]}
+
+    base, cand = index(baseline), index(candidate)
+    rows = []
+    for key in sorted(base.keys() & cand.keys()):
+        old, new = base[key], cand[key]
+        throughput = new["ops_per_sec"] / old["ops_per_sec"] - 1 if old["ops_per_sec"] else 0.0
+        p99 = new["p99_ms"] / old["p99_ms"] - 1 if old["p99_ms"] else 0.0
+        rows.append({
+            "size": key[0], "threads": key[1], "op": key[2],
+            "ops_per_sec": [old["ops_per_sec"], new["ops_per_sec"]],
+            "p99_ms": [old["p99_ms"], new["p99_ms"]],
+            "throughput_change": round(throughput, 4),
+            "p99_change": round(p99, 4),
+            "regression": throughput < -threshold or p99 > threshold,
+        })
+    return {
+        "threshold": threshold,
+        "comparisons": rows,
+        "regressions": sum(1 for row in rows if row["regression"]),
+        "unmatched": sorted(str(key) for key in base.keys() ^ cand.keys()),
+    }
+
+
+def bench_profile(profile, rows=10000, readers=4, duration=2.0, workdir=None):
+    """Run one writer and `readers` reader threads against a fresh database using `profile`.
+
+    Returns the number of committed writes and point reads per second.
+    """
+    workdir = workdir or tempfile.mkdtemp(prefix="inv_bench_")
+    db_name = os.path.join(workdir, "profile_%s.db" % (profile or "default"))
+    if os.path.exists(db_name):
+        os.remove(db_name)
+    _seed(db_name, rows, profile)
+
+    stop = threading.Event()
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def writer():
+        conn = sqlite3.connect(db_name)
+        im.apply_storage_profile(conn, profile)
+        rng = random.Random(1)
+        done = errors = 0
+        while not stop.is_set():
+            try:
+                # One small transaction per write, the way short request handlers behave
+                conn.execute("UPDATE inventory SET quantity = ? WHERE id = ?",
+                             (rng.randint(0, 500), rng.randint(1, rows)))
+                conn.commit()
+                done += 1
+            except sqlite3.OperationalError:
+                conn.rollback()
+                errors += 1
+        conn.close()
+        with lock:
+            counts["writes"] += done
+            counts["errors"] += errors
+
+    def reader(seed):
+        conn = sqlite3.connect(db_name)
+        im.apply_storage_profile(conn, profile)
+        rng = random.Random(seed)
+        done = errors = 0
+        while not stop.is_set():
+            try:
+                conn.execute("SELECT id, name, quantity, price FROM inventory WHERE id = ?",
+                             (rng.randint(1, rows),)).fetchone()
+                done += 1
+            except sqlite3.OperationalError:
+                errors += 1
+        conn.close()
+        with lock:
+            counts["reads"] += done
+            counts["errors"] += errors
+
+    threads = [threading.Thread(target=writer)]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        "profile": profile or "default",
+        "readers": readers,
+        "reads_per_sec": round(counts["reads"] / elapsed, 1),
+        "writes_per_sec": round(counts["writes"] / elapsed, 1),
+        "lock_errors": counts["errors"],
+    }
+
+
+def bench_profiles(profiles=None, **options):
+    profiles = profiles or [None] + list(im.STORAGE_PROFILES)
+    workdir = tempfile.mkdtemp(prefix="inv_bench_")
+    return [bench_profile(profile, workdir=workdir, **options) for profile in profiles]
+
+
+def bench_async(rows=10000, tasks=64, operations=5000, max_connections=4, workdir=None):
+    """Drive AsyncInventory with `tasks` concurrent coroutines doing a 90/10 read/write mix.
+
+    Returns operations per second and how far the event loop fell behind while waiting.
+    """
+    workdir = workdir or tempfile.mkdtemp(prefix="inv_bench_")
+    db_name = os.path.join(workdir, "async.db")
+    if os.path.exists(db_name):
+        os.remove(db_name)
+    _seed(db_name, rows, "throughput")
+
+    async def run():
+        lag = {"max": 0.0}
+
+        async def heartbeat(stop):
+            # Measures event loop stalls: a blocking call would show up as a large lag
+            loop = asyncio.get_running_loop()
+            while not stop.is_set():
+                expected = loop.time() + 0.01
+                await asyncio.sleep(0.01)
+                lag["max"] = max(lag["max"], loop.time() - expected)
+
+        async with inventory_async.AsyncInventory(db_name, max_connections=max_connections) as inv:
+            per_task = operations // tasks
+
+            async def worker(seed):
+                rng = random.Random(seed)
+                for _ in range(per_task):
+                    item_id = rng.randint(1, rows)
+                    if rng.random() < 0.9:
+                        await inv.view_item(item_id)
+                    else:
+                        await inv.update_inventory(item_id, rng.randint(0, 500), 1.0)
+
+            stop = asyncio.Event()
+            beat = asyncio.create_task(heartbeat(stop))
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(i) for i in range(tasks)))
+            elapsed = time.perf_counter() - started
+            stop.set()
+            await beat
+            return {
+                "tasks": tasks,
+                "max_connections": max_connections,
+                "operations": per_task * tasks,
+                "ops_per_sec": round(per_task * tasks / elapsed, 1),
+                "max_loop_lag_ms": round(lag["max"] * 1000, 3),
+            }
+
+    return asyncio.run(run())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="inventory_manager benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_profiles = sub.add_parser("profiles", help="read/write throughput per storage profile")
+    p_profiles.add_argument("--profile", action="append", dest="profiles",
+                            help="profile to run (repeatable, default: all plus SQLite defaults)")
+    p_profiles.add_argument("--rows", type=int, default=10000)
+    p_profiles.add_argument("--readers", type=int, default=4)
+    p_profiles.add_argument("--duration", type=float, default=2.0)
+
+    p_run = sub.add_parser("run", help="throughput and p50/p99 latency of every CRUD operation")
+    p_run.add_argument("--sizes", type=int, nargs="+", default=[10000],
+                       help="inventory sizes to seed, e.g. 10000 1000000 10000000")
+    p_run.add_argument("--threads", type=int, nargs="+", default=[1, 4])
+    p_run.add_argument("--operations", type=int, default=2000, help="calls per operation")
+    p_run.add_argument("--scan-operations", type=int, default=3, help="calls of full-table view_inventory")
+    p_run.add_argument("--profile", default="throughput", choices=sorted(im.STORAGE_PROFILES))
+    p_run.add_argument("--workdir", help="where seeded databases are kept between runs")
+    p_run.add_argument("--out", help="also write the JSON report to this file")
+
+    p_compare = sub.add_parser("compare", help="compare two run reports; exits 1 on regressions")
+    p_compare.add_argument("baseline")
+    p_compare.add_argument("candidate")
+    p_compare.add_argument("--threshold", type=float, default=0.10)
+
+    p_async = sub.add_parser("async", help="AsyncInventory throughput under concurrent coroutines")
+    p_async.add_argument("--rows", type=int, default=10000)
+    p_async.add_argument("--tasks", type=int, default=64)
+    p_async.add_argument("--operations", type=int, default=5000)
+    p_async.add_argument("--max-connections", type=int, default=4)
+
+    args = parser.parse_args(argv)
+    status = 0
+    if args.command == "run":
+        results = run_suite(args.sizes, args.threads, args.operations, args.scan_operations,
+                            args.profile, args.workdir)
+        if args.out:
+            with open(args.out, "w") as f:
+                json.dump(results, f, indent=2)
+    elif args.command == "compare":
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.candidate) as f:
+            candidate = json.load(f)
+        results = compare_reports(baseline, candidate, args.threshold)
+        status = 1 if results["regressions"] else 0
+    elif args.command == "profiles":
+        results = bench_profiles(args.profiles, rows=args.rows, readers=args.readers, duration=args.duration)
+    elif args.command == "async":
+        results = bench_async(args.rows, args.tasks, args.operations, args.max_connections)
+    print(json.dumps(results, indent=2))
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
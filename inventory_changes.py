@@ -0,0 +1,144 @@
+# inventory_changes.py - change-data-capture feed over the inventory_changes table
+
+import sqlite3, asyncio, time, logging
+from collections import namedtuple
+
+import inventory_manager as im
+
+# Get logger
+logger = logging.getLogger("InventoryApp.changes")
+
+# One inventory mutation; name/quantity/price are the new values (None for deletes)
+Change = namedtuple('Change', "seq op item_id name quantity price changed_at")
+
+
+class ChangesExpired(Exception):
+    """The consumer's position was compacted away; it must resynchronize from a full read."""
+
+
+def _oldest_seq(cursor):
+    cursor.execute("SELECT MIN(seq) FROM inventory_changes")
+    return cursor.fetchone()[0]
+
+
+def latest_seq(cursor):
+    # Position of the newest change, 0 when the log is empty; a new consumer can start here
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'inventory_changes'")
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+@im.log_db_operation
+def _read_changes(cursor, seq, limit):
+    # (changes, expiry message or None). Expiry is reported rather than raised here so the
+    # decorator does not log an expected ChangesExpired as an error.
+    try:
+        cursor.execute("""
+            SELECT seq, op, item_id, name, quantity, price, changed_at FROM inventory_changes
+            WHERE seq > ? ORDER BY seq LIMIT ?
+            """, (seq, limit))
+        changes = [Change(*row) for row in cursor.fetchall()]
+        # seq values have no gaps except where compaction deleted entries
+        first_expected = seq + 1
+        if not changes or changes[0].seq != first_expected:
+            oldest = _oldest_seq(cursor)
+            if oldest is None:
+                # Log fully compacted: anything written after `seq` is gone
+                if latest_seq(cursor) > seq:
+                    return changes, "changes after seq %s were compacted; the log is empty" % seq
+            elif oldest > first_expected:
+                return changes, "changes after seq %s were compacted; oldest retained is %s" % (seq, oldest)
+        return changes, None
+    except sqlite3.Error as e:
+        logger.error("Database error reading changes since %s: %s", seq, e, exc_info=True)
+        raise
+
+
+def changes_since(cursor, seq=0, limit=1000):
+    """Up to `limit` changes with a sequence number greater than `seq`, in order.
+
+    Pass the seq of the last change processed to get the next page. Raises ChangesExpired when
+    changes after `seq` have already been removed by compact_changes, including for seq=0 once
+    the start of the log is gone; a consumer that does not need the history starts from
+    latest_seq() instead.
+    """
+    changes, expired = _read_changes(cursor, seq, limit)
+    if expired is not None:
+        raise ChangesExpired(expired)
+    return changes
+
+
+def tail_changes(db_name, seq=0, batch=1000, poll_interval=0.5, stop=None):
+    """Blocking iterator that yields changes after `seq` forever (or until `stop` is set).
+
+    Uses its own connection and only queries the log when PRAGMA data_version reports a
+    commit from another connection, so idle polling costs almost nothing.
+    """
+    conn = sqlite3.connect(db_name)
+    try:
+        cursor = conn.cursor()
+        last_version = None
+        while stop is None or not stop.is_set():
+            cursor.execute("PRAGMA data_version")
+            version = cursor.fetchone()[0]
+            if version != last_version:
+                last_version = version
+                while True:
+                    changes = changes_since(cursor, seq, batch)
+                    for change in changes:
+                        yield change
+                    if changes:
+                        seq = changes[-1].seq
+                    if len(changes) < batch:
+                        break
+            time.sleep(poll_interval)
+    finally:
+        conn.close()
+
+
+async def atail_changes(db_name, seq=0, batch=1000, poll_interval=0.5):
+    """Async counterpart of tail_changes; each poll runs in a worker thread."""
+    conn = sqlite3.connect(db_name, check_same_thread=False)
+    try:
+        cursor = conn.cursor()
+        while True:
+            changes = await asyncio.to_thread(changes_since, cursor, seq, batch)
+            for change in changes:
+                yield change
+            if changes:
+                seq = changes[-1].seq
+            if len(changes) < batch:
+                await asyncio.sleep(poll_interval)
+    finally:
+        conn.close()
+
+
+@im.log_db_operation
+def compact_changes(cursor, keep_seconds=None, keep_last=None):
+    """Delete old changes, keeping those newer than `keep_seconds` and/or the newest `keep_last`.
+
+    An entry is deleted only if it falls outside every limit given. Returns rows deleted.
+    """
+    if keep_seconds is None and keep_last is None:
+        raise ValueError("give keep_seconds and/or keep_last")
+    try:
+        bounds = []
+        if keep_last is not None:
+            bounds.append(latest_seq(cursor) - keep_last)
+        if keep_seconds is not None:
+            # Oldest entry inside the window; the scan stops there, so it only reads expired rows
+            cursor.execute("""
+                SELECT seq FROM inventory_changes
+                WHERE changed_at >= (julianday('now') - 2440587.5) * 86400.0 - ?
+                ORDER BY seq LIMIT 1
+                """, (keep_seconds,))
+            row = cursor.fetchone()
+            bounds.append(row[0] - 1 if row else latest_seq(cursor))
+        cutoff = min(bounds)
+        cursor.execute("DELETE FROM inventory_changes WHERE seq <= ?", (cutoff,))
+        deleted = cursor.rowcount
+    except sqlite3.Error as e:
+        logger.error("Database error compacting change log: %s", e, exc_info=True)
+        raise
+    logger.info("Compacted change log: %s entries up to seq %s removed.", deleted, cutoff)
+    return deleted
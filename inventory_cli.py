@@ -0,0 +1,314 @@
+# inventory_cli.py - command line interface for scripted inventory operations
+
+import argparse, json, os, sqlite3, sys, time, logging
+from contextlib import contextmanager
+
+import inventory_manager as im
+import inventory_io
+import inventory_backup
+
+# Get logger
+logger = logging.getLogger("InventoryApp")
+
+
+class ProgressPrinter:
+    """Prints rows done and throughput to stderr, at most every `interval` seconds."""
+
+    def __init__(self, label, interval=0.5, stream=sys.stderr, unit="rows"):
+        self.label = label
+        self.unit = unit
+        self.interval = interval
+        self.stream = stream
+        self._last = 0.0
+
+    def __call__(self, rows, seconds):
+        now = time.monotonic()
+        if now - self._last < self.interval:
+            return
+        self._last = now
+        rate = rows / seconds if seconds else 0.0
+        self.stream.write("%s %d %s (%.0f %s/s)\n" % (self.label, rows, self.unit, rate, self.unit))
+        self.stream.flush()
+
+    def finish(self, rows, seconds):
+        self._last = 0.0
+        self(rows, seconds)
+
+
+class CommandError(Exception):
+    """A command failed in a way that should be reported without a traceback."""
+
+
+def _emit(args, record, text=None):
+    # One JSON object per line with --json, otherwise a human readable line
+    if args.json:
+        sys.stdout.write(json.dumps(record) + "\n")
+    else:
+        sys.stdout.write((text if text is not None else " ".join("%s=%s" % kv for kv in record.items())) + "\n")
+
+
+def _emit_item(args, item):
+    _emit(args, item._asdict(), im.format_item(item))
+
+
+def _require_db(args, exists=False):
+    if not args.db:
+        raise CommandError("no database given: use --db or set INVENTORY_DB")
+    # sqlite3.connect would silently create a mistyped path as an empty database
+    if exists and not os.path.exists(args.db):
+        raise CommandError("database %s does not exist" % args.db)
+
+
+@contextmanager
+def _session(args, create=False):
+    # Only commands that add data may create the database file
+    _require_db(args, exists=not create)
+    with im.managed_db_session(args.db, profile=args.profile) as cursor:
+        # Upgrades a database from an older release before any command touches newer columns;
+        # a single PRAGMA read once the schema is current
+        im.create_inv_tables(cursor)
+        yield cursor
+
+
+def cmd_add(args):
+    with _session(args, create=True) as cursor:
+        if not im.add_item(cursor, args.name, args.quantity, args.price):
+            raise CommandError("could not add item %r" % args.name)
+        _emit(args, {"id": cursor.lastrowid, "name": args.name, "quantity": args.quantity, "price": args.price})
+    return 0
+
+
+def cmd_get(args):
+    with _session(args) as cursor:
+        item = im.get_item(cursor, args.id)
+    if item is None:
+        _emit(args, {"id": args.id, "error": "not found"})
+        return 1
+    _emit_item(args, item)
+    return 0
+
+
+def cmd_list(args):
+    with _session(args) as cursor:
+        items = im.iter_inventory(cursor, after_id=args.after)
+        for count, item in enumerate(items):
+            if args.limit is not None and count >= args.limit:
+                break
+            _emit_item(args, item)
+    return 0
+
+
+def cmd_update(args):
+    with _session(args) as cursor:
+        updated = im.update_inventory(cursor, args.id, args.quantity, args.price)
+    _emit(args, {"id": args.id, "updated": updated})
+    return 0 if updated else 1
+
+
+def cmd_delete(args):
+    with _session(args) as cursor:
+        deleted = im.delete_item(cursor, args.id)
+    _emit(args, {"id": args.id, "deleted": deleted})
+    return 0 if deleted else 1
+
+
+def _run_operation(cursor, op):
+    # Executes one operation read by `batch`; returns the result record
+    kind = op.get("op")
+    if kind == "add":
+        if not im.add_item(cursor, op["name"], int(op["quantity"]), float(op["price"])):
+            raise CommandError("could not add item %r" % op["name"])
+        return {"op": kind, "id": cursor.lastrowid}
+    if kind == "get":
+        item = im.get_item(cursor, int(op["id"]))
+        return {"op": kind, "id": int(op["id"]), "item": item._asdict() if item else None}
+    if kind == "update":
+        return {"op": kind, "id": int(op["id"]),
+                "updated": im.update_inventory(cursor, int(op["id"]), int(op["quantity"]), float(op["price"]))}
+    if kind == "adjust":
+        return {"op": kind, "id": int(op["id"]),
+                "quantity": im.adjust_quantity(cursor, int(op["id"]), int(op["delta"]), op.get("floor", 0))}
+    if kind == "delete":
+        return {"op": kind, "id": int(op["id"]), "deleted": im.delete_item(cursor, int(op["id"]))}
+    raise CommandError("unknown op %r" % kind)
+
+
+def cmd_batch(args):
+    """Run JSON-lines operations from stdin over one connection in one transaction.
+
+    Any invalid operation rolls back the whole batch.
+    """
+    count = 0
+    with _session(args, create=True) as cursor:
+        for line, text in enumerate(sys.stdin, 1):
+            if not text.strip():
+                continue
+            try:
+                op = json.loads(text)
+                result = _run_operation(cursor, op)
+            except (ValueError, KeyError, TypeError, AttributeError, CommandError) as e:
+                raise CommandError("line %s: %s; batch rolled back" % (line, e)) from None
+            _emit(args, result)
+            count += 1
+    logger.info("Batch of %s operations committed.", count)
+    return 0
+
+
+def cmd_bench(args):
+    # Imported on demand so the other commands never load the benchmark dependencies
+    import inventory_bench
+    return inventory_bench.main(args.bench_args)
+
+
+def cmd_import(args):
+    progress = ProgressPrinter("imported") if args.progress else None
+    with _session(args, create=True) as cursor:
+        result = inventory_io.import_inventory(cursor, args.path, args.format, args.batch_size,
+                                               args.errors, progress)
+    if progress is not None:
+        progress.finish(result.imported, result.seconds)
+    print("imported=%d skipped=%d seconds=%.2f" % (result.imported, result.skipped, result.seconds),
+          file=sys.stderr)
+    return 0
+
+
+def cmd_export(args):
+    progress = ProgressPrinter("exported") if args.progress else None
+    started = time.perf_counter()
+    with _session(args) as cursor:
+        count = inventory_io.export_inventory(cursor, args.path, args.format, progress=progress)
+    elapsed = time.perf_counter() - started
+    if progress is not None:
+        progress.finish(count, elapsed)
+    print("exported=%d seconds=%.2f" % (count, elapsed), file=sys.stderr)
+    return 0
+
+
+def cmd_backup(args):
+    _require_db(args, exists=True)
+    progress = None
+    if args.progress:
+        printer = ProgressPrinter("backed up", unit="pages")
+        started = time.perf_counter()
+        progress = lambda done, total: printer(done, time.perf_counter() - started)
+    result = inventory_backup.backup_inventory(args.db, args.dest, args.pages_per_step, args.sleep, progress)
+    _emit(args, {"dest": args.dest, "pages": result.pages, "seconds": round(result.seconds, 3)})
+    return 0
+
+
+def cmd_restore(args):
+    _require_db(args)
+    result = inventory_backup.restore_inventory(args.source, args.db, args.pages_per_step)
+    _emit(args, {"source": args.source, "pages": result.pages, "seconds": round(result.seconds, 3)})
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="inventory", description="Inventory database command line tool")
+    parser.add_argument("--db", default=os.environ.get("INVENTORY_DB"),
+                        help="inventory database file (default: $INVENTORY_DB)")
+    parser.add_argument("--profile", default="throughput", choices=sorted(im.STORAGE_PROFILES),
+                        help="storage profile applied to the connection (default: throughput)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log INFO messages to stderr")
+    parser.add_argument("--json", action="store_true", help="print results as JSON lines")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_add = sub.add_parser("add", help="add an item")
+    p_add.add_argument("name")
+    p_add.add_argument("quantity", type=int)
+    p_add.add_argument("price", type=float)
+    p_add.set_defaults(func=cmd_add)
+
+    p_get = sub.add_parser("get", help="show one item by id")
+    p_get.add_argument("id", type=int)
+    p_get.set_defaults(func=cmd_get)
+
+    p_list = sub.add_parser("list", help="stream items in id order")
+    p_list.add_argument("--limit", type=int)
+    p_list.add_argument("--after", type=int, help="only items with an id greater than this")
+    p_list.set_defaults(func=cmd_list)
+
+    p_update = sub.add_parser("update", help="set an item's quantity and price")
+    p_update.add_argument("id", type=int)
+    p_update.add_argument("quantity", type=int)
+    p_update.add_argument("price", type=float)
+    p_update.set_defaults(func=cmd_update)
+
+    p_delete = sub.add_parser("delete", help="delete an item")
+    p_delete.add_argument("id", type=int)
+    p_delete.set_defaults(func=cmd_delete)
+
+    p_batch = sub.add_parser("batch", help="run JSON-lines operations from stdin in one transaction",
+                             description='Each line is an object such as {"op": "add", "name": "Remote", '
+                                         '"quantity": 5, "price": 10.99}; ops are add, get, update, adjust, delete.')
+    p_batch.set_defaults(func=cmd_batch)
+
+    p_backup = sub.add_parser("backup", help="online backup of the database while writers keep running")
+    p_backup.add_argument("dest", help="backup file to write")
+    p_backup.add_argument("--pages-per-step", type=int, default=inventory_backup.DEFAULT_PAGES_PER_STEP)
+    p_backup.add_argument("--sleep", type=float, default=0.0, help="seconds to pause between steps")
+    p_backup.add_argument("--no-progress", dest="progress", action="store_false")
+    p_backup.set_defaults(func=cmd_backup)
+
+    p_restore = sub.add_parser("restore", help="replace the database with a backup file")
+    p_restore.add_argument("source", help="backup file to restore from")
+    p_restore.add_argument("--pages-per-step", type=int, default=inventory_backup.DEFAULT_PAGES_PER_STEP)
+    p_restore.set_defaults(func=cmd_restore)
+
+    p_bench = sub.add_parser("bench", help="run inventory_bench (arguments are passed through)")
+    p_bench.add_argument("bench_args", nargs=argparse.REMAINDER)
+    p_bench.set_defaults(func=cmd_bench)
+
+    p_import = sub.add_parser("import", help="stream a CSV or JSON Lines file into the inventory")
+    p_import.add_argument("path", help="file to read, or - for stdin")
+    p_import.add_argument("--format", choices=inventory_io.FORMATS, help="default: from the file extension")
+    p_import.add_argument("--batch-size", type=int, default=im.DEFAULT_BATCH_SIZE)
+    p_import.add_argument("--errors", choices=("raise", "skip"), default="raise",
+                          help="stop at the first invalid row, or skip invalid rows")
+    p_import.add_argument("--no-progress", dest="progress", action="store_false")
+    p_import.set_defaults(func=cmd_import)
+
+    p_export = sub.add_parser("export", help="stream the inventory to a CSV or JSON Lines file")
+    p_export.add_argument("path", help="file to write, or - for stdout")
+    p_export.add_argument("--format", choices=inventory_io.FORMATS, help="default: from the file extension")
+    p_export.add_argument("--no-progress", dest="progress", action="store_false")
+    p_export.set_defaults(func=cmd_export)
+
+    return parser
+
+
+class _BriefFormatter(logging.Formatter):
+    # Without -v, errors logged by the library stay on one line; the final "error:" line says what failed
+    def format(self, record):
+        record = logging.makeLogRecord(record.__dict__)
+        record.exc_info = record.exc_text = None
+        return super().format(record)
+
+
+def _setup_logging(verbose):
+    # Leaves alone an application that embeds the CLI and configured "InventoryApp" itself
+    if logger.handlers:
+        return
+    handler = logging.StreamHandler(sys.stderr)
+    formatter_class = logging.Formatter if verbose else _BriefFormatter
+    handler.setFormatter(formatter_class("%(asctime)s [%(name)-25s] | [%(levelname)-8s] : %(message)s",
+                                         datefmt="%I:%M:%S"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO if verbose else logging.WARNING)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    _setup_logging(args.verbose)
+    try:
+        return args.func(args)
+    except (CommandError, inventory_io.ImportRowError, ValueError) as e:
+        print("error: %s" % e, file=sys.stderr)
+        return 2
+    except sqlite3.Error as e:
+        print("error: database %s: %s" % (args.db, e), file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
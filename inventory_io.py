@@ -0,0 +1,174 @@
+# inventory_io.py - streaming CSV / JSON Lines import and export for the inventory table
+
+import csv, json, math, os, sys, time, logging
+from collections import namedtuple
+from contextlib import contextmanager
+
+import inventory_manager as im
+
+# Get logger
+logger = logging.getLogger("InventoryApp.io")
+
+FORMATS = ("csv", "jsonl")
+CSV_FIELDS = ("id", "name", "quantity", "price")
+
+# Largest value SQLite stores as an INTEGER
+_MAX_QUANTITY = 2 ** 63 - 1
+
+# Outcome of import_inventory
+ImportResult = namedtuple('ImportResult', "imported skipped id_ranges seconds")
+
+
+class ImportRowError(ValueError):
+    """A row in an import file failed validation."""
+
+    def __init__(self, line, message):
+        super().__init__("line %s: %s" % (line, message))
+        self.line = line
+
+
+def detect_format(path, format=None):
+    if format is not None:
+        if format not in FORMATS:
+            raise ValueError("Unsupported format %r (expected one of %s)" % (format, ", ".join(FORMATS)))
+        return format
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError("Cannot tell the format of %r; pass format='csv' or 'jsonl'" % path)
+
+
+@contextmanager
+def _open(path, mode):
+    # "-" means stdin/stdout so the functions work in pipelines
+    if path == "-":
+        yield sys.stdin if "r" in mode else sys.stdout
+        return
+    with open(path, mode, newline="", encoding="utf-8") as f:
+        yield f
+
+
+def validate_row(record, line):
+    """Return (name, quantity, price) from a parsed record or raise ImportRowError."""
+    try:
+        name = record["name"]
+        quantity = record["quantity"]
+        price = record["price"]
+    except KeyError as e:
+        raise ImportRowError(line, "missing field %s" % e) from None
+    if not isinstance(name, str) or not name.strip():
+        raise ImportRowError(line, "name must be a non-empty string")
+    # JSON booleans would otherwise pass as 1/0
+    if isinstance(quantity, bool) or isinstance(price, bool):
+        raise ImportRowError(line, "quantity must be an integer and price a number")
+    try:
+        price = float(price)
+        if isinstance(quantity, str):
+            quantity = quantity.strip()
+            # "3.0" is accepted, but 3.9 is never truncated to 3
+            quantity = int(quantity) if quantity.lstrip("+-").isdigit() else float(quantity)
+    except (TypeError, ValueError):
+        raise ImportRowError(line, "quantity must be an integer and price a number") from None
+    if not isinstance(quantity, (int, float)):
+        raise ImportRowError(line, "quantity must be an integer and price a number")
+    # nan/inf would reach SQLite as NULL or inf and fail the whole batch
+    if not math.isfinite(price) or (isinstance(quantity, float) and not math.isfinite(quantity)):
+        raise ImportRowError(line, "quantity and price must be finite numbers")
+    if isinstance(quantity, float):
+        if not quantity.is_integer():
+            raise ImportRowError(line, "quantity must be a whole number")
+        quantity = int(quantity)
+    if quantity > _MAX_QUANTITY:
+        raise ImportRowError(line, "quantity is too large")
+    if quantity < 0 or price < 0:
+        raise ImportRowError(line, "quantity and price must not be negative")
+    return (name.strip(), quantity, price)
+
+
+def _read_records(f, format):
+    # Yields (line_number, record) pairs; malformed JSON is reported as an ImportRowError record
+    if format == "csv":
+        reader = csv.DictReader(f)
+        for record in reader:
+            yield reader.line_num, record
+    else:
+        for line, text in enumerate(f, 1):
+            if not text.strip():
+                continue
+            try:
+                record = json.loads(text)
+            except ValueError as e:
+                yield line, ImportRowError(line, "invalid JSON: %s" % e)
+                continue
+            if not isinstance(record, dict):
+                record = ImportRowError(line, "expected a JSON object")
+            yield line, record
+
+
+def import_inventory(cursor, path, format=None, batch_size=im.DEFAULT_BATCH_SIZE, errors="raise",
+                     progress=None):
+    """Stream rows from a CSV or JSON Lines file into the inventory, committing every batch.
+
+    `errors` is "raise" (stop at the first invalid row; earlier batches stay committed) or
+    "skip" (log and skip invalid rows). `progress(rows, seconds)` is called after every
+    `batch_size` valid rows; the final totals are in the returned ImportResult.
+    """
+    if errors not in ("raise", "skip"):
+        raise ValueError("errors must be 'raise' or 'skip'")
+    format = detect_format(path, format)
+    counts = {"read": 0, "skipped": 0}
+    started = time.perf_counter()
+
+    def rows(f):
+        for line, record in _read_records(f, format):
+            try:
+                if isinstance(record, ImportRowError):
+                    raise record
+                row = validate_row(record, line)
+            except ImportRowError as e:
+                if errors == "raise":
+                    raise
+                counts["skipped"] += 1
+                logger.warning("Skipping invalid row in %s: %s", path, e)
+                continue
+            counts["read"] += 1
+            if progress is not None and counts["read"] % batch_size == 0:
+                progress(counts["read"], time.perf_counter() - started)
+            yield row
+
+    with _open(path, "r") as f:
+        result = im.add_items(cursor, rows(f), batch_size)
+    elapsed = time.perf_counter() - started
+
+    logger.info("Imported %s rows from %s in %.2fs (%s skipped).", result.count, path, elapsed, counts["skipped"])
+    return ImportResult(result.count, counts["skipped"], result.id_ranges, elapsed)
+
+
+def export_inventory(cursor, path, format=None, page_size=im.DEFAULT_PAGE_SIZE, progress=None):
+    """Stream the whole inventory to a CSV or JSON Lines file in id order; returns the row count.
+
+    `progress(rows, seconds)` is called after each full page; the final count is the return value.
+    """
+    format = detect_format(path, format)
+    started = time.perf_counter()
+    count = 0
+
+    with _open(path, "w") as f:
+        if format == "csv":
+            writer = csv.writer(f)
+            writer.writerow(CSV_FIELDS)
+            write = writer.writerow
+        else:
+            def write(item):
+                f.write(json.dumps(item._asdict()) + "\n")
+        for item in im.iter_inventory(cursor, page_size):
+            write(item)
+            count += 1
+            if progress is not None and count % page_size == 0:
+                progress(count, time.perf_counter() - started)
+    elapsed = time.perf_counter() - started
+
+    logger.info("Exported %s rows to %s in %.2fs.", count, path, elapsed)
+    return count
@@ -1,38 +1,278 @@
 
 # inventory_manager.py version 3
 
-import sqlite3, functools, datetime, logging
-from collections import namedtuple
+import sqlite3, functools, datetime, logging, itertools, random, time
+import threading
+from collections import namedtuple, OrderedDict
 from contextlib import contextmanager
 
+import inventory_metrics as metrics
+import inventory_migrations as migrations
+
 # Get logger
 logger = logging.getLogger("InventoryApp.manager")
 
 # namedtiple for handling items in inventory
 InventoryItem = namedtuple('InventoryItem', "id name quantity price")
 
+# Result of a bulk insert: total rows inserted and the (first_id, last_id) ranges assigned
+BulkInsertResult = namedtuple('BulkInsertResult', "count id_ranges")
+
+# Result of a batch update/delete: rows matched and the sorted list of ids that did not exist
+BatchResult = namedtuple('BatchResult', "matched missing")
+
+# Optimistic concurrency: an item with its row version, and the outcome of a conditional write
+VersionedItem = namedtuple('VersionedItem', "item version")
+VersionedResult = namedtuple('VersionedResult', "status version")
+OK, CONFLICT, MISSING = "ok", "conflict", "missing"
+
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_PAGE_SIZE = 1000
+
+# Named storage profiles applied when a session opens. Pragmas are applied in order,
+# busy_timeout first so switching the journal mode waits for other connections.
+STORAGE_PROFILES = {
+    # WAL with full fsync on every commit
+    "durable": (
+        ("busy_timeout", 5000),
+        ("journal_mode", "WAL"),
+        ("synchronous", "FULL"),
+        ("cache_size", -16000),
+        ("mmap_size", 0),
+        ("temp_store", "DEFAULT"),
+    ),
+    # WAL fsyncs only at checkpoints; a power loss may drop the last commits but never corrupts
+    "throughput": (
+        ("busy_timeout", 5000),
+        ("journal_mode", "WAL"),
+        ("synchronous", "NORMAL"),
+        ("cache_size", -65536),
+        ("mmap_size", 268435456),
+        ("temp_store", "MEMORY"),
+    ),
+    # Large imports: no fsync at all, big cache. Only for data that can be reloaded.
+    "bulk-load": (
+        ("busy_timeout", 30000),
+        ("journal_mode", "WAL"),
+        ("synchronous", "OFF"),
+        ("cache_size", -262144),
+        ("mmap_size", 1073741824),
+        ("temp_store", "MEMORY"),
+    ),
+}
+
+class ItemCache:
+    """Size-bounded LRU cache of InventoryItem by id with a time-to-live.
+
+    Keyed by item id only, so one enabled cache serves a single database. Writes made
+    through this module invalidate the affected ids, once when the row changes and again
+    when the transaction ends (see transaction_finished), and reads inside a write
+    transaction bypass the cache, so uncommitted rows are never cached.
+    """
+
+    def __init__(self, max_size=1024, ttl=60.0):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()   # item_id -> (item, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.generation = 0             # bumped by every invalidation
+
+    def get(self, item_id):
+        with self._lock:
+            entry = self._entries.get(item_id)
+            if entry is not None:
+                item, expires_at = entry
+                if self.ttl is None or time.monotonic() < expires_at:
+                    self._entries.move_to_end(item_id)
+                    self.hits += 1
+                    return item
+                del self._entries[item_id]
+            self.misses += 1
+            return None
+
+    def put(self, item, generation=None):
+        # `generation` read before the row was fetched: the row may be stale if anything was invalidated since
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[item.id] = (item, expires_at)
+            self._entries.move_to_end(item.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, item_id):
+        with self._lock:
+            self.generation += 1
+            if self._entries.pop(item_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+# Opt-in read-through cache used by get_item / view_item (None = disabled)
+_item_cache = None
+
+def enable_item_cache(max_size=1024, ttl=60.0):
+    global _item_cache
+    _item_cache = ItemCache(max_size, ttl)
+    return _item_cache
+
+def disable_item_cache():
+    global _item_cache
+    _item_cache = None
+
+def get_cache_stats():
+    # Counters of the enabled item cache, or None when caching is off
+    return _item_cache.stats() if _item_cache is not None else None
+
+# Ids written in each connection's open transaction, keyed by id(connection), so they can be
+# invalidated again once the transaction ends (another connection may re-cache the old row
+# between the write and the commit)
+_written_ids = {}
+_written_ids_lock = threading.Lock()
+
+def _invalidate_cached_ids(cursor, ids):
+    cache = _item_cache
+    if cache is not None:
+        ids = list(ids)
+        for item_id in ids:
+            cache.invalidate(item_id)
+        with _written_ids_lock:
+            _written_ids.setdefault(id(cursor.connection), set()).update(ids)
+
+def _invalidate_cached(cursor, item_id):
+    _invalidate_cached_ids(cursor, (item_id,))
+
+def transaction_finished(conn):
+    """Invalidate the items written by `conn` once its transaction has committed or rolled back.
+
+    Called by managed_db_session, the connection pool and the group-commit writer; code that
+    commits a connection itself while the item cache is enabled should call it too.
+    """
+    with _written_ids_lock:
+        ids = _written_ids.pop(id(conn), None)
+    cache = _item_cache
+    if ids and cache is not None:
+        for item_id in ids:
+            cache.invalidate(item_id)
+
+# Settings for log_db_operation, changed through configure_op_logging()
+_op_log_settings = {
+    "sample_rate": 1.0,     # fraction of calls traced at DEBUG level
+    "slow_threshold": None, # seconds; calls at least this slow are logged at WARNING
+}
+
+def configure_op_logging(sample_rate=None, slow_threshold=None, clear_slow_threshold=False):
+    # sample_rate: 0.0 - 1.0 of calls traced when DEBUG is enabled.
+    # slow_threshold: seconds, logs slow calls at WARNING whatever the level; clear_slow_threshold disables it.
+    if sample_rate is not None:
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate must be between 0.0 and 1.0")
+        _op_log_settings["sample_rate"] = sample_rate
+    if slow_threshold is not None:
+        _op_log_settings["slow_threshold"] = slow_threshold
+    elif clear_slow_threshold:
+        _op_log_settings["slow_threshold"] = None
+    return dict(_op_log_settings)
+
+def _rows_affected(args, result):
+    # Batch writes report their own count: the cursor's rowcount belongs to their last (cleanup) statement
+    if isinstance(result, BatchResult):
+        return result.matched
+    if isinstance(result, dict):
+        # adjust_quantities: {item_id: new_quantity or None when rejected}
+        return sum(1 for value in result.values() if value is not None)
+    # Single-statement operations: rows changed by that statement, when the first argument is a cursor
+    rowcount = getattr(args[0], "rowcount", -1) if args else -1
+    return rowcount if isinstance(rowcount, int) and rowcount > 0 else 0
+
 def log_db_operation(func):
+    name = func.__name__
+    
     @functools.wraps(func)
     def wrapper_function(*args, **kwargs):
+        slow_threshold = _op_log_settings["slow_threshold"]
+        sample_rate = _op_log_settings["sample_rate"]
+        traced = logger.isEnabledFor(logging.DEBUG) and (sample_rate >= 1.0 or random.random() < sample_rate)
+        collect = metrics.enabled
+        
+        # Fast path: nothing will be emitted unless the call fails
+        if not traced and slow_threshold is None and not collect:
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                logger.error("ERROR during %s: %s", name, e, exc_info=True)
+                raise
+        
+        started = time.perf_counter()
         try:
-            print("called")
-            logger.debug(f"Calling function %s with arguments: %s, %s", func.__name__, args, kwargs)
+            if traced:
+                logger.debug("Calling function %s with arguments: %s, %s", name, args, kwargs)
             result = func(*args, **kwargs)
-            logger.debug(f"Successfully executed: %s. Result {result}", func.__name__)
-            logger.debug(f"-" * 40 + "")
-            return result
         except Exception as e:
-            logger.error(f"ERROR during %s: %s", func.__name__, e, exc_info=True)
+            if collect:
+                metrics.record(name, time.perf_counter() - started, error=True)
+            logger.error("ERROR during %s: %s", name, e, exc_info=True)
             raise
+        elapsed = time.perf_counter() - started
+        
+        if collect:
+            # add_item, update_inventory and delete_item report failure by returning False
+            if result is False:
+                metrics.record(name, elapsed, error=True)
+            else:
+                metrics.record(name, elapsed, _rows_affected(args, result))
+        if traced:
+            logger.debug("Successfully executed: %s in %.3f ms. Result %s", name, elapsed * 1000, result)
+            logger.debug("-" * 40)
+        if slow_threshold is not None and elapsed >= slow_threshold:
+            logger.warning("Slow call: %s took %.3f ms with arguments: %s, %s", name, elapsed * 1000, args, kwargs)
+        return result
     return wrapper_function
 
+def apply_storage_profile(conn, profile):
+    # `profile` is a name from STORAGE_PROFILES or None to keep SQLite's defaults
+    if profile is None:
+        return
+    try:
+        pragmas = STORAGE_PROFILES[profile]
+    except KeyError:
+        raise ValueError("Unknown storage profile: %r" % (profile,)) from None
+    for pragma, value in pragmas:
+        conn.execute("PRAGMA %s = %s" % (pragma, value)).fetchall()
+    logger.debug("Storage profile '%s' applied.", profile)
 
 @contextmanager
-def managed_db_session(db_name):
+def managed_db_session(db_name, profile=None):
     conn = None # Initialize conn to None
     try:
         conn = sqlite3.connect(db_name)
-        cursor = conn.cursor()
+        apply_storage_profile(conn, profile)
+        cursor = metrics.new_cursor(conn)
         logger.debug(f"Database connection to '%s' successful...", db_name)
         yield cursor
         conn.commit()
@@ -48,6 +288,7 @@ def managed_db_session(db_name):
         raise
     finally:
         if conn:
+            transaction_finished(conn)
             logger.debug(f"Database connection to '%s' closed...", db_name)
             conn.close()
 
@@ -67,20 +308,160 @@ def connect_inv_database(db_name):
         return None
 """
 
-@log_db_operation
-def create_inv_tables(cursor):
-    try:
-        # SQL command to create a table (inventory table)
-        # IF NOT EXISTS ensures it doesn't error if table already exists
-        cursor.execute("""
+# Core schema history. Append new migrations here; never edit one that has shipped.
+MIGRATIONS = (
+    migrations.Migration(1, "create inventory table", (
+        # IF NOT EXISTS ensures it doesn't error on databases created before migrations existed
+        migrations.execute("""
            CREATE TABLE IF NOT EXISTS inventory (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 name TEXT NOT NULL,
                 quantity INTEGER NOT NULL DEFAULT 0,
                 price REAL NOT NULL DEFAULT 0.0
-           )            
-        """)
-        logger.info("Table 'inventory' checked/created successfully.")
+           )
+        """),
+    )),
+    migrations.Migration(2, "name and quantity indexes", (
+        migrations.create_index("idx_inventory_name_nocase", "inventory", "name COLLATE NOCASE"),
+        migrations.create_index("idx_inventory_quantity", "inventory", "quantity"),
+    )),
+    # Serve the reports in inventory_reports: price bands and top-N by stock value
+    migrations.Migration(3, "price and stock value indexes", (
+        migrations.create_index("idx_inventory_price", "inventory", "price"),
+        migrations.create_index("idx_inventory_value", "inventory", "quantity * price"),
+    )),
+    # Row version for optimistic concurrency
+    migrations.Migration(4, "row version column", (
+        migrations.add_column("inventory", "version", "INTEGER NOT NULL DEFAULT 1"),
+    )),
+)
+LATEST_SCHEMA_VERSION = max(m.version for m in MIGRATIONS)
+
+def _table_exists(cursor, name):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,))
+    return cursor.fetchone() is not None
+
+def _install_full_text(cursor):
+    # External-content FTS5 index over inventory.name, kept in sync by triggers
+    if _table_exists(cursor, "inventory_fts"):
+        return
+    cursor.execute("""
+        CREATE VIRTUAL TABLE inventory_fts USING fts5(
+            name, content='inventory', content_rowid='id', prefix='2 3'
+        )
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS inventory_fts_ai AFTER INSERT ON inventory BEGIN
+            INSERT INTO inventory_fts (rowid, name) VALUES (new.id, new.name);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS inventory_fts_ad AFTER DELETE ON inventory BEGIN
+            INSERT INTO inventory_fts (inventory_fts, rowid, name) VALUES ('delete', old.id, old.name);
+        END
+    """)
+    # Quantity/price updates leave the index alone
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS inventory_fts_au AFTER UPDATE OF name ON inventory BEGIN
+            INSERT INTO inventory_fts (inventory_fts, rowid, name) VALUES ('delete', old.id, old.name);
+            INSERT INTO inventory_fts (rowid, name) VALUES (new.id, new.name);
+        END
+    """)
+    # Index rows that existed before full-text search was enabled
+    cursor.execute("INSERT INTO inventory_fts (inventory_fts) VALUES ('rebuild')")
+    logger.info("Full-text index 'inventory_fts' created.")
+
+def _install_summary(cursor):
+    # Single-row running totals, kept current by triggers so reading them is O(1)
+    if _table_exists(cursor, "inventory_summary"):
+        return
+    cursor.execute("""
+        CREATE TABLE inventory_summary (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            sku_count INTEGER NOT NULL,
+            total_units INTEGER NOT NULL,
+            total_value REAL NOT NULL
+        )
+    """)
+    cursor.execute("""
+        INSERT INTO inventory_summary (id, sku_count, total_units, total_value)
+        SELECT 1, COUNT(*), COALESCE(SUM(quantity), 0), COALESCE(SUM(quantity * price), 0.0) FROM inventory
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS inventory_summary_ai AFTER INSERT ON inventory BEGIN
+            UPDATE inventory_summary SET sku_count = sku_count + 1,
+                total_units = total_units + new.quantity,
+                total_value = total_value + new.quantity * new.price
+            WHERE id = 1;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS inventory_summary_ad AFTER DELETE ON inventory BEGIN
+            UPDATE inventory_summary SET sku_count = sku_count - 1,
+                total_units = total_units - old.quantity,
+                total_value = total_value - old.quantity * old.price
+            WHERE id = 1;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS inventory_summary_au AFTER UPDATE OF quantity, price ON inventory BEGIN
+            UPDATE inventory_summary SET
+                total_units = total_units + new.quantity - old.quantity,
+                total_value = total_value + new.quantity * new.price - old.quantity * old.price
+            WHERE id = 1;
+        END
+    """)
+    logger.info("Summary table 'inventory_summary' created.")
+
+def _install_change_log(cursor):
+    # Append-only feed of row changes read by inventory_changes; seq orders the feed
+    if _table_exists(cursor, "inventory_changes"):
+        return
+    cursor.execute("""
+        CREATE TABLE inventory_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            op TEXT NOT NULL CHECK (op IN ('insert', 'update', 'delete')),
+            item_id INTEGER NOT NULL,
+            name TEXT,
+            quantity INTEGER,
+            price REAL,
+            changed_at REAL NOT NULL DEFAULT ((julianday('now') - 2440587.5) * 86400.0)
+        )
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS inventory_changes_ai AFTER INSERT ON inventory BEGIN
+            INSERT INTO inventory_changes (op, item_id, name, quantity, price)
+            VALUES ('insert', new.id, new.name, new.quantity, new.price);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS inventory_changes_au AFTER UPDATE ON inventory BEGIN
+            INSERT INTO inventory_changes (op, item_id, name, quantity, price)
+            VALUES ('update', new.id, new.name, new.quantity, new.price);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS inventory_changes_ad AFTER DELETE ON inventory BEGIN
+            INSERT INTO inventory_changes (op, item_id) VALUES ('delete', old.id);
+        END
+    """)
+    logger.info("Change log 'inventory_changes' created.")
+
+@log_db_operation
+def create_inv_tables(cursor, full_text=False, summary=False, change_log=False):
+    # full_text=True also installs the FTS5 index used by search_items (requires SQLite built with FTS5)
+    # summary=True installs inventory_summary, trigger-maintained totals read by inventory_reports
+    # change_log=True installs inventory_changes, the change feed read by inventory_changes
+    try:
+        # Brings the core schema up to date; a single PRAGMA read when it already is
+        version = migrations.migrate(cursor, MIGRATIONS)
+        # Optional features: one sqlite_master lookup each, only when requested
+        for requested, install in ((full_text, _install_full_text), (summary, _install_summary),
+                                   (change_log, _install_change_log)):
+            if requested:
+                with migrations.write_lock(cursor, "install_feature"):
+                    install(cursor)
+        logger.info("Table 'inventory' checked/created successfully (schema version %s).", version)
     except sqlite3.Error as e:
         logger.error(f"Error creating 'inventory' table: %s", e, exc_info=True)
         raise
@@ -95,6 +476,7 @@ def add_item(cursor, name, quantity, price):
     try:
         # Execute sql command with tuple of values for the placeholders
         cursor.execute(sql, (name, quantity, price)) 
+        _invalidate_cached(cursor, cursor.lastrowid)
         logger.info(f"Item '%s' added successfully (ID: %s).", name, cursor.lastrowid)
         return True
     except sqlite3.IntegrityError as e:
@@ -104,56 +486,222 @@ def add_item(cursor, name, quantity, price):
         logger.error(f"Database error adding bookmark: %s", e, exc_info=True)
         return False
 
-@log_db_operation    
-def view_inventory(cursor):
+def _chunked(iterable, size):
+    # Yield lists of at most `size` elements without materializing the whole iterable
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+def _item_values(item):
+    # Accept InventoryItem (id is ignored, SQLite assigns it) or plain (name, quantity, price) tuples
+    if len(item) == 4:
+        return (item[1], item[2], item[3])
+    name, quantity, price = item
+    return (name, quantity, price)
+
+@log_db_operation
+def _insert_batch(cursor, rows):
+    cursor.executemany("INSERT INTO inventory (name, quantity, price) VALUES (?, ?, ?)", rows)
+    # AUTOINCREMENT ids handed out inside a single write transaction are contiguous
+    # Separate cursor so `cursor.rowcount` still reports the inserted rows
+    last_id = cursor.connection.execute("SELECT last_insert_rowid()").fetchone()[0]
+    cursor.connection.commit()
+    return (last_id - len(rows) + 1, last_id)
+
+def add_items(cursor, items, batch_size=DEFAULT_BATCH_SIZE):
+    """Bulk insert items (any iterable, including generators), committing once per batch.
+
+    Returns a BulkInsertResult with the number of rows inserted and the id ranges assigned.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+
+    count = 0
+    id_ranges = []
+    try:
+        for batch in _chunked(items, batch_size):
+            first_id, last_id = _insert_batch(cursor, [_item_values(item) for item in batch])
+            count += len(batch)
+            # Merge with the previous range when batches are back to back
+            if id_ranges and id_ranges[-1][1] + 1 == first_id:
+                id_ranges[-1] = (id_ranges[-1][0], last_id)
+            else:
+                id_ranges.append((first_id, last_id))
+    except sqlite3.Error as e:
+        logger.error("Database error during bulk insert after %s rows: %s", count, e, exc_info=True)
+        raise
+
+    logger.info("Bulk insert added %s items in %s id range(s).", count, len(id_ranges))
+    return BulkInsertResult(count, id_ranges)
+
+def get_inventory_page(cursor, page_size=DEFAULT_PAGE_SIZE, after_id=None):
+    # Keyset pagination: seek past the last id seen instead of using OFFSET
     sql = """
-        SELECT id, name, quantity, price FROM inventory ORDER BY id
+        SELECT id, name, quantity, price FROM inventory WHERE id > ? ORDER BY id LIMIT ?
         """
+    cursor.execute(sql, (after_id if after_id is not None else -1, page_size))
+    return [InventoryItem(*row) for row in cursor.fetchmany(page_size)]
+
+def iter_inventory(cursor, page_size=DEFAULT_PAGE_SIZE, after_id=None):
+    """Lazily yield every InventoryItem in id order, one page of `page_size` rows at a time.
+
+    Each page is a separate indexed range query, so memory stays flat regardless of table
+    size and the cursor may be reused by the caller between items.
+    """
+    if page_size < 1:
+        raise ValueError("page_size must be at least 1")
+    while True:
+        try:
+            page = get_inventory_page(cursor, page_size, after_id)
+        except sqlite3.Error as e:
+            logger.error("Database error reading inventory after id %s: %s", after_id, e, exc_info=True)
+            raise
+        yield from page
+        if len(page) < page_size:
+            return
+        after_id = page[-1].id
+
+@log_db_operation
+def get_item(cursor, item_id):
+    # Returns the InventoryItem for item_id, or None when it does not exist
+    sql = "SELECT id, name, quantity, price FROM inventory WHERE inventory.id = ?"
+    
+    # Inside a write transaction the row may be uncommitted (or our own write), so skip the cache
+    cache = _item_cache if not cursor.connection.in_transaction else None
+    if cache is not None:
+        item = cache.get(item_id)
+        if item is not None:
+            return item
+        generation = cache.generation
     
     try:
-        cursor.execute(sql)
-        inventory = cursor.fetchall()
+        cursor.execute(sql, (item_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        item = InventoryItem(*row)
+        if cache is not None:
+            cache.put(item, generation)
+        return item
+    except sqlite3.Error as e:
+        logger.error(f"Database error fetching item id: %s | %s", item_id, e, exc_info=True)
+        raise
 
-        inventory_list = []
+def list_inventory(cursor, limit=None, after_id=None):
+    # Materialized list of items in id order; prefer iter_inventory for large tables
+    items = iter_inventory(cursor, after_id=after_id)
+    return list(itertools.islice(items, limit) if limit is not None else items)
 
-        if inventory:
-            for item in inventory:
-                itme_obj = InventoryItem(*item)
-                inventory_list.append(itme_obj)
-        
-        if inventory_list:
-            for item in inventory_list:
-                logger.info(f"ID: %s | Name: %-8s | Qty: %-3s | Price: %-5s", item.id, item.name, item.quantity, item.price)
-            logger.info("--------------------\n")
+# Upper bound for prefix range scans: sorts after any character that can follow the prefix
+_PREFIX_UPPER = "\U0010ffff"
+
+@log_db_operation
+def find_by_name(cursor, name):
+    # Case-insensitive exact match, served by idx_inventory_name_nocase
+    sql = """
+        SELECT id, name, quantity, price FROM inventory WHERE name = ? COLLATE NOCASE ORDER BY id
+        """
+    
+    try:
+        cursor.execute(sql, (name,))
+        return [InventoryItem(*row) for row in cursor.fetchall()]
     except sqlite3.Error as e:
-        logger.error(f"Database error viewing inventory: %s", e, exc_info=True)
+        logger.error("Database error finding item name: %s | %s", name, e, exc_info=True)
         raise
 
-@log_db_operation       
-def view_item(cursor, item_id):
-    sql = "SELECT id, name, quantity, price FROM inventory WHERE inventory.id = ?"
+@log_db_operation
+def search_prefix(cursor, prefix, limit=50):
+    # Case-insensitive prefix search as an index range scan. LIKE 'x%' cannot use the
+    # NOCASE index here because the column itself is declared with BINARY collation.
+    sql = """
+        SELECT id, name, quantity, price FROM inventory
+        WHERE name >= ? COLLATE NOCASE AND name < ? COLLATE NOCASE
+        ORDER BY name COLLATE NOCASE LIMIT ?
+        """
     
     try:
-        cursor.execute(sql, (item_id,))
-        item = cursor.fetchone()
+        cursor.execute(sql, (prefix, prefix + _PREFIX_UPPER, limit))
+        return [InventoryItem(*row) for row in cursor.fetchall()]
+    except sqlite3.Error as e:
+        logger.error("Database error searching prefix: %s | %s", prefix, e, exc_info=True)
+        raise
+
+def _fts_query(text):
+    # Turn free text into an FTS5 query: every word must match, as a whole word or a prefix.
+    # Words are quoted so operator characters typed by users are treated literally.
+    terms = ['"%s"*' % word.replace('"', '""') for word in text.split()]
+    return " ".join(terms)
+
+@log_db_operation
+def search_items(cursor, query, limit=50):
+    # Ranked (bm25) full-text search over item names; needs create_inv_tables(cursor, full_text=True)
+    match = _fts_query(query)
+    if not match:
+        return []
+    sql = """
+        SELECT i.id, i.name, i.quantity, i.price
+        FROM inventory_fts f JOIN inventory i ON i.id = f.rowid
+        WHERE inventory_fts MATCH ?
+        ORDER BY f.rank LIMIT ?
+        """
+    
+    try:
+        cursor.execute(sql, (match, limit))
+        return [InventoryItem(*row) for row in cursor.fetchall()]
+    except sqlite3.Error as e:
+        logger.error("Database error searching items: %s | %s", query, e, exc_info=True)
+        raise
+
+# --- Rendering: optional presentation of items returned by the read functions above ---
+
+def format_item(item):
+    return "ID: %s | Name: %-8s | Qty: %-3s | Price: %-5s" % (item.id, item.name, item.quantity, item.price)
+
+def render_items(items, log=logger, level=logging.INFO):
+    # Log each item; returns how many were rendered. Skips formatting when `level` is disabled.
+    if not log.isEnabledFor(level):
+        return sum(1 for _ in items)
+    count = 0
+    for item in items:
+        log.log(level, "ID: %s | Name: %-8s | Qty: %-3s | Price: %-5s", item.id, item.name, item.quantity, item.price)
+        count += 1
+    return count
+
+@log_db_operation    
+def view_inventory(cursor, page_size=DEFAULT_PAGE_SIZE):
+    # Renders the full inventory to the log and returns the number of items shown
+    try:
+        count = render_items(iter_inventory(cursor, page_size))
         
-        if item:
-            item_obj = InventoryItem(*item)
-            logger.info(f"ID: %s | Name: %-8s | Qty: %-3s | Price: %-5s", item_obj.id, item_obj.name, item_obj.quantity, item_obj.price)
-        else:
-            logger.warning(f"No item found for item ID: %s", item_id)
+        if count:
+            logger.info("--------------------\n")
+        return count
     except sqlite3.Error as e:
-        logger.error(f"Database error fetching item id: %s | %s", item_id, e, exc_info=True)
+        logger.error(f"Database error viewing inventory: %s", e, exc_info=True)
         raise
 
+def view_item(cursor, item_id):
+    # Renders a single item to the log and returns it (None when not found)
+    item = get_item(cursor, item_id)
+    
+    if item:
+        render_items((item,))
+    else:
+        logger.warning(f"No item found for item ID: %s", item_id)
+    return item
+
 @log_db_operation        
 def update_inventory(cursor, item_id, new_qty, new_price):
     sql = """
-        UPDATE inventory SET quantity = ?, price = ? WHERE id = ?
+        UPDATE inventory SET quantity = ?, price = ?, version = version + 1 WHERE id = ?
         """
     
     try:
         cursor.execute(sql, (new_qty, new_price, item_id))
+        _invalidate_cached(cursor, item_id)
         
         if cursor.rowcount > 0:
             logger.info(f"Inventory for item ID %s updated successfully.", item_id)
@@ -165,12 +713,66 @@ def update_inventory(cursor, item_id, new_qty, new_price):
         logger.error(f"Database error updating inventory: %s", e, exc_info=True)
         return False
 
+# Guard is skipped when floor is NULL (floor=None)
+_ADJUST_SQL = """
+    UPDATE inventory SET quantity = quantity + ?, version = version + 1
+    WHERE id = ? AND (? IS NULL OR quantity + ? >= ?)
+    RETURNING quantity
+    """
+
+def _adjust(cursor, item_id, delta, floor):
+    cursor.execute(_ADJUST_SQL, (delta, item_id, floor, delta, floor))
+    row = cursor.fetchone()
+    _invalidate_cached(cursor, item_id)
+    return row[0] if row else None
+
+@log_db_operation
+def adjust_quantity(cursor, item_id, delta, floor=0):
+    """Atomically add `delta` (may be negative) to an item's quantity in one statement.
+
+    Returns the new quantity, or None when the item does not exist or the result would
+    fall below `floor` (pass floor=None to allow any result).
+    """
+    try:
+        new_qty = _adjust(cursor, item_id, delta, floor)
+        if new_qty is None:
+            logger.warning("Quantity of item ID %s not adjusted by %s: item missing or below floor %s.", item_id, delta, floor)
+        return new_qty
+    except sqlite3.Error as e:
+        logger.error("Database error adjusting quantity of item ID %s: %s", item_id, e, exc_info=True)
+        raise
+
+@log_db_operation
+def adjust_quantities(cursor, deltas, floor=0):
+    """Apply many (item_id, delta) adjustments in the current transaction.
+
+    Returns {item_id: new_quantity}, with None for adjustments that were rejected. When an
+    id appears more than once the deltas apply in order and the last result is kept.
+    """
+    results = {}
+    applied = rejected = 0
+    try:
+        for item_id, delta in deltas:
+            applied += 1
+            new_qty = _adjust(cursor, item_id, delta, floor)
+            results[item_id] = new_qty
+            if new_qty is None:
+                rejected += 1
+    except sqlite3.Error as e:
+        logger.error("Database error adjusting quantities after %s items: %s", applied - 1, e, exc_info=True)
+        raise
+    
+    if rejected:
+        logger.warning("%s of %s quantity adjustments rejected: item missing or below floor %s.", rejected, applied, floor)
+    return results
+
 @log_db_operation   
 def delete_item(cursor, item_id):
     sql = "DELETE FROM inventory WHERE id = ?"
     
     try:
         cursor.execute(sql, (item_id,))
+        _invalidate_cached(cursor, item_id)
         if cursor.rowcount > 0:
             logger.info(f"Item ID: %s, successfully deleted.", item_id)
             return True
@@ -181,6 +783,144 @@ def delete_item(cursor, item_id):
         logger.error(f"Database error deleting item from inventory: %s", e, exc_info=True)
         raise
 
+# --- Optimistic concurrency: writes that only apply if the row version is unchanged ---
+
+@log_db_operation
+def get_item_versioned(cursor, item_id):
+    # VersionedItem for item_id (bypasses the item cache), or None when it does not exist
+    try:
+        cursor.execute("SELECT id, name, quantity, price, version FROM inventory WHERE id = ?", (item_id,))
+        row = cursor.fetchone()
+        return VersionedItem(InventoryItem(*row[:4]), row[4]) if row else None
+    except sqlite3.Error as e:
+        logger.error("Database error fetching item id: %s | %s", item_id, e, exc_info=True)
+        raise
+
+def _current_version(cursor, item_id):
+    cursor.execute("SELECT version FROM inventory WHERE id = ?", (item_id,))
+    row = cursor.fetchone()
+    return VersionedResult(CONFLICT, row[0]) if row else VersionedResult(MISSING, None)
+
+@log_db_operation
+def update_inventory_versioned(cursor, item_id, expected_version, new_qty, new_price):
+    """Update quantity and price only if the row is still at `expected_version`.
+
+    Returns VersionedResult(OK, new_version), (CONFLICT, current_version) or (MISSING, None).
+    """
+    sql = """
+        UPDATE inventory SET quantity = ?, price = ?, version = version + 1
+        WHERE id = ? AND version = ?
+        RETURNING version
+        """
+    
+    try:
+        cursor.execute(sql, (new_qty, new_price, item_id, expected_version))
+        row = cursor.fetchone()
+        _invalidate_cached(cursor, item_id)
+        if row:
+            logger.info("Inventory for item ID %s updated to version %s.", item_id, row[0])
+            return VersionedResult(OK, row[0])
+        result = _current_version(cursor, item_id)
+        logger.warning("Update of item ID %s at version %s not applied: %s (current version %s).",
+                       item_id, expected_version, result.status, result.version)
+        return result
+    except sqlite3.Error as e:
+        logger.error("Database error updating inventory: %s", e, exc_info=True)
+        raise
+
+@log_db_operation
+def delete_item_versioned(cursor, item_id, expected_version):
+    # Delete only if the row is still at `expected_version`; returns a VersionedResult
+    try:
+        cursor.execute("DELETE FROM inventory WHERE id = ? AND version = ?", (item_id, expected_version))
+        _invalidate_cached(cursor, item_id)
+        if cursor.rowcount > 0:
+            logger.info("Item ID: %s, successfully deleted.", item_id)
+            return VersionedResult(OK, expected_version)
+        result = _current_version(cursor, item_id)
+        logger.warning("Delete of item ID %s at version %s not applied: %s (current version %s).",
+                       item_id, expected_version, result.status, result.version)
+        return result
+    except sqlite3.Error as e:
+        logger.error("Database error deleting item from inventory: %s", e, exc_info=True)
+        raise
+
+def retry_on_conflict(operation, attempts=5, backoff=0.005):
+    """Call `operation()` until it returns a VersionedResult that is not CONFLICT.
+
+    `operation` should re-read the item (get_item_versioned) and attempt the conditional write,
+    committing its own transaction. Sleeps with jittered exponential backoff between attempts
+    and returns the last result.
+    """
+    for attempt in range(attempts):
+        result = operation()
+        if result.status != CONFLICT:
+            return result
+        if attempt < attempts - 1:
+            time.sleep(backoff * (2 ** attempt) * (0.5 + random.random()))
+    logger.warning("Giving up after %s conflicting attempts.", attempts)
+    return result
+
+def _stage_ids(cursor):
+    # Temp table holding the ids of the batch being processed (one per connection)
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS _batch_ids (id INTEGER PRIMARY KEY)")
+    cursor.execute("DELETE FROM temp._batch_ids")
+
+def _missing_staged_ids(cursor):
+    cursor.execute("""
+        SELECT b.id FROM temp._batch_ids b
+        WHERE NOT EXISTS (SELECT 1 FROM main.inventory i WHERE i.id = b.id)
+        ORDER BY b.id
+        """)
+    return [row[0] for row in cursor.fetchall()]
+
+@log_db_operation
+def update_items(cursor, rows, batch_size=DEFAULT_BATCH_SIZE):
+    """Set quantity and price for many (item_id, new_qty, new_price) rows in the current transaction.
+
+    Returns a BatchResult with the number of rows matched and the ids that do not exist.
+    """
+    matched = 0
+    try:
+        _stage_ids(cursor)
+        for batch in _chunked(rows, batch_size):
+            ids = [(item_id,) for item_id, _, _ in batch]
+            cursor.executemany("INSERT OR IGNORE INTO temp._batch_ids (id) VALUES (?)", ids)
+            cursor.executemany("UPDATE inventory SET quantity = ?, price = ?, version = version + 1 WHERE id = ?",
+                               [(qty, price, item_id) for item_id, qty, price in batch])
+            matched += cursor.rowcount
+            _invalidate_cached_ids(cursor, (item_id for (item_id,) in ids))
+        missing = _missing_staged_ids(cursor)
+        cursor.execute("DELETE FROM temp._batch_ids")
+    except sqlite3.Error as e:
+        logger.error("Database error during batch update: %s", e, exc_info=True)
+        raise
+    
+    logger.info("Batch update matched %s rows, %s ids missing.", matched, len(missing))
+    return BatchResult(matched, missing)
+
+@log_db_operation
+def delete_items(cursor, ids, batch_size=DEFAULT_BATCH_SIZE):
+    """Delete many items in the current transaction with one set-based DELETE.
+
+    Returns a BatchResult with the number of rows deleted and the ids that do not exist.
+    """
+    try:
+        _stage_ids(cursor)
+        for batch in _chunked(ids, batch_size):
+            cursor.executemany("INSERT OR IGNORE INTO temp._batch_ids (id) VALUES (?)", [(item_id,) for item_id in batch])
+            _invalidate_cached_ids(cursor, batch)
+        missing = _missing_staged_ids(cursor)
+        cursor.execute("DELETE FROM inventory WHERE id IN (SELECT id FROM temp._batch_ids)")
+        matched = cursor.rowcount
+        cursor.execute("DELETE FROM temp._batch_ids")
+    except sqlite3.Error as e:
+        logger.error("Database error during batch delete: %s", e, exc_info=True)
+        raise
+    
+    logger.info("Batch delete removed %s rows, %s ids missing.", matched, len(missing))
+    return BatchResult(matched, missing)
+
 """       
 if __name__ == "__main__":
     db_conn = connect_inv_database("inventory.db")
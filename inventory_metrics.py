@@ -0,0 +1,260 @@
+# inventory_metrics.py - per-operation metrics, Prometheus export and slow-query log
+
+import sqlite3, threading, time, os, logging, itertools, tempfile
+from collections import deque, namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Get logger
+logger = logging.getLogger("InventoryApp.metrics")
+slow_logger = logging.getLogger("InventoryApp.slowquery")
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implied
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Opt-in: log_db_operation only records metrics after enable_metrics(), so the
+# undecorated fast path stays in place for everyone else
+enabled = False
+
+_lock = threading.Lock()
+_operations = {}
+
+
+class _OperationStats:
+    __slots__ = ("calls", "errors", "rows", "seconds", "max_seconds", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+
+def _bucket_index(elapsed):
+    for i, bound in enumerate(LATENCY_BUCKETS):
+        if elapsed <= bound:
+            return i
+    return len(LATENCY_BUCKETS)
+
+
+def enable_metrics():
+    global enabled
+    enabled = True
+
+
+def disable_metrics():
+    global enabled
+    enabled = False
+
+
+def record(name, elapsed, rows=0, error=False):
+    """Record one call of operation `name` that took `elapsed` seconds."""
+    index = _bucket_index(elapsed)
+    with _lock:
+        stats = _operations.get(name)
+        if stats is None:
+            stats = _operations[name] = _OperationStats()
+        stats.calls += 1
+        stats.seconds += elapsed
+        stats.buckets[index] += 1
+        if elapsed > stats.max_seconds:
+            stats.max_seconds = elapsed
+        if error:
+            stats.errors += 1
+        elif rows > 0:
+            stats.rows += rows
+
+
+def get_metrics():
+    """Snapshot of all operation metrics as plain dicts, keyed by operation name."""
+    with _lock:
+        snapshot = {}
+        for name, stats in _operations.items():
+            cumulative = list(itertools.accumulate(stats.buckets))
+            snapshot[name] = {
+                "calls": stats.calls,
+                "errors": stats.errors,
+                "rows": stats.rows,
+                "seconds_total": stats.seconds,
+                "seconds_max": stats.max_seconds,
+                "seconds_avg": stats.seconds / stats.calls if stats.calls else 0.0,
+                "histogram": dict(zip([str(b) for b in LATENCY_BUCKETS] + ["+Inf"], cumulative)),
+            }
+        return snapshot
+
+
+def reset_metrics():
+    with _lock:
+        _operations.clear()
+    with _slow_lock:
+        _slow_queries.clear()
+
+
+def render_prometheus():
+    """Metrics in the Prometheus text exposition format."""
+    snapshot = get_metrics()
+    lines = [
+        "# HELP inventory_op_calls_total Calls of each inventory operation.",
+        "# TYPE inventory_op_calls_total counter",
+    ]
+    lines += ['inventory_op_calls_total{op="%s"} %d' % (op, m["calls"]) for op, m in sorted(snapshot.items())]
+    lines += [
+        "# HELP inventory_op_errors_total Calls that raised an exception.",
+        "# TYPE inventory_op_errors_total counter",
+    ]
+    lines += ['inventory_op_errors_total{op="%s"} %d' % (op, m["errors"]) for op, m in sorted(snapshot.items())]
+    lines += [
+        "# HELP inventory_op_rows_total Rows affected, as reported by the cursor.",
+        "# TYPE inventory_op_rows_total counter",
+    ]
+    lines += ['inventory_op_rows_total{op="%s"} %d' % (op, m["rows"]) for op, m in sorted(snapshot.items())]
+    lines += [
+        "# HELP inventory_op_duration_seconds Latency of each inventory operation.",
+        "# TYPE inventory_op_duration_seconds histogram",
+    ]
+    for op, m in sorted(snapshot.items()):
+        for bound, count in m["histogram"].items():
+            lines.append('inventory_op_duration_seconds_bucket{op="%s",le="%s"} %d' % (op, bound, count))
+        lines.append('inventory_op_duration_seconds_sum{op="%s"} %r' % (op, m["seconds_total"]))
+        lines.append('inventory_op_duration_seconds_count{op="%s"} %d' % (op, m["calls"]))
+    lines += [
+        "# HELP inventory_slow_queries_total Statements slower than the slow-query threshold.",
+        "# TYPE inventory_slow_queries_total counter",
+        "inventory_slow_queries_total %d" % _slow_total,
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path):
+    """Write the metrics atomically to `path`, e.g. for node_exporter's textfile collector."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".inventory_metrics_")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(render_prometheus())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("metrics endpoint: " + format, *args)
+
+
+def start_metrics_server(port=9464, host="127.0.0.1"):
+    """Serve /metrics from a daemon thread; returns the server (call shutdown() to stop).
+
+    Also turns metrics collection on, since an endpoint without it would stay empty.
+    """
+    enable_metrics()
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="inventory-metrics", daemon=True).start()
+    logger.info("Metrics endpoint listening on http://%s:%s/metrics", host, server.server_port)
+    return server
+
+
+# --- Slow-query log ---
+
+_slow_lock = threading.Lock()
+_slow_threshold = None     # seconds; None = disabled
+_slow_queries = deque(maxlen=100)
+_slow_total = 0
+
+SlowQuery = namedtuple('SlowQuery', "timestamp seconds sql parameters plan")
+
+
+def enable_slow_query_log(threshold=0.1, max_entries=100):
+    """Capture statements slower than `threshold` seconds, with their EXPLAIN QUERY PLAN.
+
+    Applies to cursors created through new_cursor(), which managed_db_session,
+    pooled_db_session, AsyncInventory, ShardedInventory and GroupCommitWriter use.
+    """
+    global _slow_threshold, _slow_queries
+    with _slow_lock:
+        _slow_threshold = threshold
+        _slow_queries = deque(_slow_queries, maxlen=max_entries)
+
+
+def disable_slow_query_log():
+    global _slow_threshold
+    _slow_threshold = None
+
+
+def get_slow_queries():
+    with _slow_lock:
+        return list(_slow_queries)
+
+
+def _explain(conn, sql, parameters):
+    try:
+        rows = conn.execute("EXPLAIN QUERY PLAN " + sql, parameters).fetchall()
+        return [row[-1] for row in rows]
+    except sqlite3.Error as e:
+        return ["<no plan: %s>" % e]
+
+
+def _record_slow(conn, sql, parameters, elapsed):
+    global _slow_total
+    plan = _explain(conn, sql, parameters) if parameters is not None else []
+    entry = SlowQuery(time.time(), elapsed, " ".join(sql.split()), parameters, plan)
+    with _slow_lock:
+        _slow_queries.append(entry)
+        _slow_total += 1
+    slow_logger.warning("Slow query (%.3f ms): %s | params: %s | plan: %s",
+                        elapsed * 1000, entry.sql, parameters, "; ".join(plan))
+
+
+class SlowQueryCursor(sqlite3.Cursor):
+    """Cursor that times execute()/executemany() and logs statements over the threshold.
+
+    SQLite computes rows lazily, so the time measured is up to the first result row; sorts
+    and aggregates are included, streaming the remaining rows is not.
+    """
+
+    def execute(self, sql, parameters=()):
+        threshold = _slow_threshold
+        if threshold is None:
+            return super().execute(sql, parameters)
+        started = time.perf_counter()
+        result = super().execute(sql, parameters)
+        elapsed = time.perf_counter() - started
+        if elapsed >= threshold:
+            _record_slow(self.connection, sql, parameters, elapsed)
+        return result
+
+    def executemany(self, sql, seq_of_parameters):
+        threshold = _slow_threshold
+        if threshold is None:
+            return super().executemany(sql, seq_of_parameters)
+        # Keep the first parameter set for EXPLAIN without materializing the sequence
+        params = iter(seq_of_parameters)
+        first = next(params, None)
+        if first is None:
+            return super().executemany(sql, ())
+        started = time.perf_counter()
+        result = super().executemany(sql, itertools.chain((first,), params))
+        elapsed = time.perf_counter() - started
+        if elapsed >= threshold:
+            _record_slow(self.connection, sql, first, elapsed)
+        return result
+
+
+def new_cursor(conn):
+    # Plain cursor unless the slow-query log is enabled
+    if _slow_threshold is None:
+        return conn.cursor()
+    return conn.cursor(SlowQueryCursor)
@@ -0,0 +1,165 @@
+# inventory_migrations.py - ordered schema migrations tracked in PRAGMA user_version
+
+import sqlite3, logging
+from collections import namedtuple
+from contextlib import contextmanager
+
+# Get logger
+logger = logging.getLogger("InventoryApp.migrations")
+
+# A schema version and the steps that reach it from the previous version
+Migration = namedtuple('Migration', "version name steps")
+
+# One step of a migration. Plain steps run together in one transaction with the version
+# bump; online steps run on their own (committing as they go) and must be idempotent so
+# an interrupted migration can simply be run again.
+Step = namedtuple('Step', "description run online")
+
+
+@contextmanager
+def savepoint(cursor, name="migration"):
+    # Outermost savepoint = its own transaction; inside a caller's transaction it nests
+    cursor.execute("SAVEPOINT %s" % name)
+    try:
+        yield
+    except BaseException:
+        cursor.execute("ROLLBACK TO %s" % name)
+        cursor.execute("RELEASE %s" % name)
+        raise
+    cursor.execute("RELEASE %s" % name)
+
+
+@contextmanager
+def write_lock(cursor, name="migration"):
+    """Savepoint that holds the write lock from its first statement.
+
+    Outside a transaction it opens one with BEGIN IMMEDIATE, which waits out busy_timeout for
+    a concurrent writer; a deferred transaction that reads the schema and then writes fails
+    with "database is locked" instead when it has to upgrade its lock. Inside a caller's
+    transaction it nests as a plain savepoint.
+    """
+    if cursor.connection.in_transaction:
+        with savepoint(cursor, name):
+            yield
+        return
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+    except BaseException:
+        if cursor.connection.in_transaction:
+            cursor.execute("ROLLBACK")
+        raise
+    cursor.execute("COMMIT")
+
+
+def execute(sql, parameters=()):
+    """Step running one SQL statement."""
+    def run(cursor):
+        cursor.execute(sql, parameters)
+    return Step(" ".join(sql.split())[:80], run, False)
+
+
+def add_column(table, column, definition):
+    """Step adding a column unless it already exists (constant defaults make this O(1))."""
+    def run(cursor):
+        cursor.execute("PRAGMA table_info(%s)" % table)
+        if column not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute("ALTER TABLE %s ADD COLUMN %s %s" % (table, column, definition))
+    return Step("add column %s.%s" % (table, column), run, False)
+
+
+def create_index(name, table, columns, unique=False):
+    """Online step building an index in its own short transaction.
+
+    SQLite builds an index in a single statement, so the step cannot be split further; running
+    it alone keeps the write lock to the build itself, and an existing index is skipped.
+    """
+    def run(cursor):
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (name,))
+        if cursor.fetchone():
+            return
+        with write_lock(cursor, "create_index"):
+            cursor.execute("CREATE %sINDEX IF NOT EXISTS %s ON %s (%s)"
+                           % ("UNIQUE " if unique else "", name, table, columns))
+        logger.info("Index %s built.", name)
+    return Step("create index %s" % name, run, True)
+
+
+def backfill(table, column, expression, chunk_size=10000, where=None):
+    """Online step setting `column = expression` in rowid-range chunks, one transaction each.
+
+    Only rows matching `where` (default: `column IS NULL`) are touched, so the step resumes
+    where it stopped. Each chunk holds the write lock only briefly, letting other writers in.
+    """
+    condition = where or "%s IS NULL" % column
+
+    def run(cursor):
+        cursor.execute("SELECT MIN(rowid), MAX(rowid) FROM %s" % table)
+        low, high = cursor.fetchone()
+        if low is None:
+            return
+        updated = 0
+        start = low - 1
+        while start < high:
+            end = start + chunk_size
+            with write_lock(cursor, "backfill"):
+                cursor.execute("UPDATE %s SET %s = %s WHERE rowid > ? AND rowid <= ? AND (%s)"
+                               % (table, column, expression, condition), (start, end))
+                updated += cursor.rowcount
+            start = end
+        logger.info("Backfilled %s rows of %s.%s.", updated, table, column)
+    return Step("backfill %s.%s" % (table, column), run, True)
+
+
+def schema_version(cursor):
+    cursor.execute("PRAGMA user_version")
+    return cursor.fetchone()[0]
+
+
+def _apply_locked(cursor, version, steps, bump=False):
+    # Plain steps under the write lock; False when another connection already reached `version`
+    with write_lock(cursor):
+        if schema_version(cursor) >= version:
+            logger.info("Schema migration %s was applied by another connection.", version)
+            return False
+        for step in steps:
+            step.run(cursor)
+        if bump:
+            cursor.execute("PRAGMA user_version = %d" % version)
+    return True
+
+
+def migrate(cursor, migrations, target=None):
+    """Apply every migration newer than the database's user_version, in version order.
+
+    Returns the resulting schema version. When the database is already current this costs a
+    single PRAGMA read and no DDL runs. Concurrent callers are safe: each group of plain steps
+    runs under the write lock and re-reads user_version first, so a migration another
+    connection finished in the meantime is skipped instead of applied twice.
+    """
+    current = schema_version(cursor)
+    pending = sorted((m for m in migrations if m.version > current and (target is None or m.version <= target)),
+                     key=lambda m: m.version)
+    if not pending:
+        return current
+
+    for migration in pending:
+        logger.info("Applying schema migration %s: %s", migration.version, migration.name)
+        try:
+            batch = []
+            for step in migration.steps:
+                if not step.online:
+                    batch.append(step)
+                    continue
+                # Plain steps before an online step commit first, in order
+                if batch and not _apply_locked(cursor, migration.version, batch):
+                    break
+                batch = []
+                step.run(cursor)
+            else:
+                _apply_locked(cursor, migration.version, batch, bump=True)
+        except sqlite3.Error as e:
+            logger.error("Schema migration %s (%s) failed: %s", migration.version, migration.name, e, exc_info=True)
+            raise
+        current = migration.version
+    return current
@@ -0,0 +1,195 @@
+# inventory_parallel.py - multiprocess map/reduce scans over id ranges of the inventory table
+
+import sqlite3, csv, json, functools, os, shutil, tempfile, time, logging
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from urllib.request import pathname2url
+
+import inventory_manager as im
+import inventory_backup
+import inventory_io
+import inventory_reports as reports
+
+# Get logger
+logger = logging.getLogger("InventoryApp.parallel")
+
+# Half-open id range [low, high) scanned by one worker task
+IdRange = namedtuple('IdRange', "low high")
+
+# Several tasks per worker so one slow or dense range does not leave the other cores idle
+CHUNKS_PER_WORKER = 4
+
+
+def _read_only_connection(db_name):
+    # mode=ro fails instead of creating a missing file and can never take the write lock
+    uri = "file:%s?mode=ro" % pathname2url(os.path.abspath(db_name))
+    conn = sqlite3.connect(uri, uri=True)
+    conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+def id_ranges(db_name, chunks):
+    """Split the inventory's id space into up to `chunks` equal-width ranges."""
+    conn = _read_only_connection(db_name)
+    try:
+        low, high = conn.execute("SELECT MIN(id), MAX(id) FROM inventory").fetchone()
+    finally:
+        conn.close()
+    if low is None:
+        return []
+    width = max(1, -(-(high - low + 1) // chunks))
+    return [IdRange(start, min(start + width, high + 1)) for start in range(low, high + 1, width)]
+
+
+def _range_task(db_name, task, id_range):
+    # Runs in a worker process: task(connection, id_range) on a private read-only connection
+    conn = _read_only_connection(db_name)
+    try:
+        return task(conn, id_range)
+    finally:
+        conn.close()
+
+
+def _map_items(map_fn, conn, id_range):
+    cursor = conn.execute("SELECT id, name, quantity, price FROM inventory WHERE id >= ? AND id < ? ORDER BY id",
+                          id_range)
+    return map_fn(map(im.InventoryItem._make, cursor))
+
+
+def _run_ranges(db_name, task, reduce_fn, initial, workers, chunks, snapshot):
+    if db_name == ":memory:":
+        raise ValueError("parallel scans need a database file, not :memory:")
+    if snapshot:
+        # Workers read one consistent copy instead of each taking its own snapshot of the live file
+        directory = tempfile.mkdtemp(prefix="inventory-scan-", dir=os.path.dirname(os.path.abspath(db_name)))
+        try:
+            copy = os.path.join(directory, "snapshot.db")
+            inventory_backup.backup_inventory(db_name, copy, pages_per_step=-1)
+            return _run_ranges(copy, task, reduce_fn, initial, workers, chunks, False)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+    workers = workers or os.cpu_count() or 1
+    ranges = id_ranges(db_name, chunks or workers * CHUNKS_PER_WORKER)
+    started = time.perf_counter()
+    result = initial
+    if ranges:
+        with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as executor:
+            for partial in executor.map(functools.partial(_range_task, db_name, task), ranges):
+                result = reduce_fn(result, partial)
+    logger.info("Parallel scan of '%s': %s ranges on %s workers in %.2fs.", db_name, len(ranges), workers,
+                time.perf_counter() - started)
+    return result
+
+
+def parallel_scan(db_name, map_fn, reduce_fn, initial, workers=None, chunks=None, snapshot=False):
+    """Map/reduce over the whole inventory with a pool of worker processes.
+
+    The id space is cut into `chunks` ranges (default: CHUNKS_PER_WORKER per worker) and each
+    range is handed to a worker, which opens its own read-only connection and returns
+    `map_fn(items)` for the items of that range in id order. Partial results are folded with
+    `reduce_fn(accumulated, partial)`, starting from `initial`, in id-range order.
+
+    map_fn must be picklable (a module-level function or a functools.partial of one), and the
+    database must be a file; :memory: databases cannot be shared between processes.
+
+    Each worker reads its range in its own transaction, so while other connections write,
+    ranges may reflect different moments and the combined result matches no single state of
+    the table. Scan a quiesced database, or pass snapshot=True to first copy the database with
+    the online backup API (one consistent point in time, at the cost of writing the copy next
+    to the original).
+    """
+    return _run_ranges(db_name, functools.partial(_map_items, map_fn), reduce_fn, initial, workers, chunks,
+                       snapshot)
+
+
+# --- Built-in scans ---
+
+def valuation_map(items):
+    count = units = 0
+    value = 0.0
+    for item in items:
+        count += 1
+        units += item.quantity
+        value += item.quantity * item.price
+    return reports.Valuation(count, units, value)
+
+
+def valuation_reduce(total, partial):
+    return reports.Valuation(*(a + b for a, b in zip(total, partial)))
+
+
+def _valuation_range(conn, id_range):
+    # Same result as valuation_map, aggregated by SQLite instead of row by row in Python
+    row = conn.execute("""
+        SELECT COUNT(*), COALESCE(SUM(quantity), 0), COALESCE(SUM(quantity * price), 0.0)
+        FROM inventory WHERE id >= ? AND id < ?
+        """, id_range).fetchone()
+    return reports.Valuation(*row)
+
+
+def parallel_valuation(db_name, workers=None, chunks=None, snapshot=False):
+    """Exact SKU count, units and stock value computed across all cores (see parallel_scan for `snapshot`)."""
+    return _run_ranges(db_name, _valuation_range, valuation_reduce, reports.Valuation(0, 0, 0.0), workers, chunks,
+                       snapshot)
+
+
+def validation_map(items):
+    # Rows the import path would reject: empty names, negative or non-numeric quantity/price
+    invalid = []
+    for item in items:
+        if (not isinstance(item.name, str) or not item.name.strip()
+                or not isinstance(item.quantity, int) or item.quantity < 0
+                or not isinstance(item.price, (int, float)) or item.price < 0):
+            invalid.append(item)
+    return invalid
+
+
+def extend_reduce(found, partial):
+    # Reducer for list partials; extends in place so folding n partials stays linear
+    found.extend(partial)
+    return found
+
+
+def parallel_validate(db_name, workers=None, chunks=None, snapshot=False):
+    """Invalid items in id order; an empty list means the table is clean."""
+    return parallel_scan(db_name, validation_map, extend_reduce, [], workers, chunks, snapshot)
+
+
+def export_map(directory, format, items):
+    # Writes one range to its own part file; the parent concatenates the parts in order
+    fd, part_path = tempfile.mkstemp(dir=directory, suffix="." + format)
+    count = 0
+    with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+        if format == "csv":
+            write = csv.writer(f).writerow
+        else:
+            def write(item):
+                f.write(json.dumps(item._asdict()) + "\n")
+        for item in items:
+            write(item)
+            count += 1
+    return [(part_path, count)]
+
+
+def parallel_export(db_name, path, format=None, workers=None, chunks=None, snapshot=False):
+    """Export like inventory_io.export_inventory, formatting ranges in parallel; returns the row count.
+
+    Under concurrent writes pass snapshot=True for an export of a single point in time.
+    """
+    format = inventory_io.detect_format(path, format)
+    started = time.perf_counter()
+    directory = tempfile.mkdtemp(prefix="inventory-export-", dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        parts = parallel_scan(db_name, functools.partial(export_map, directory, format),
+                              extend_reduce, [], workers, chunks, snapshot)
+        with open(path, "w", newline="", encoding="utf-8") as out:
+            if format == "csv":
+                csv.writer(out).writerow(inventory_io.CSV_FIELDS)
+            for part_path, _ in parts:
+                with open(part_path, "r", newline="", encoding="utf-8") as part:
+                    shutil.copyfileobj(part, out)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    count = sum(count for _, count in parts)
+    logger.info("Exported %s rows to %s in %.2fs.", count, path, time.perf_counter() - started)
+    return count
@@ -0,0 +1,265 @@
+# inventory_pool.py - bounded, thread-safe SQLite connection pool
+
+import sqlite3, threading, time, logging
+from contextlib import contextmanager
+
+import inventory_manager as im
+import inventory_metrics as metrics
+
+# Get logger
+logger = logging.getLogger("InventoryApp.pool")
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available within the checkout timeout."""
+
+
+class ConnectionPool:
+    """Bounded pool of SQLite connections to a single database file.
+
+    Connections are created lazily up to `max_size`, handed out with checkout()
+    and returned with checkin(). Idle connections older than `idle_timeout`
+    seconds are closed instead of being reused, and `health_check` runs a
+    trivial query on checkout so a broken connection is replaced rather than
+    handed to the caller. `profile` names an inventory_manager storage profile
+    applied once per new connection. The first connection also runs
+    inventory_manager.create_inv_tables, so a database from an older release is
+    migrated before any pooled session uses it.
+    """
+
+    def __init__(self, db_name, max_size=5, idle_timeout=300.0, health_check=False,
+                 checkout_timeout=30.0, on_connect=None, profile=None):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.db_name = db_name
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check = health_check
+        self.checkout_timeout = checkout_timeout
+        self.on_connect = on_connect
+        self.profile = profile
+        self._schema_checked = False
+
+        self._cond = threading.Condition()
+        self._idle = []         # (connection, returned_at) pairs, most recently returned last
+        self._size = 0          # open connections, idle + checked out
+        self._closed = False
+
+        # Counters
+        self.checkouts = 0
+        self.waits = 0
+        self.created = 0
+        self.discarded = 0
+        self.checkout_time_total = 0.0
+        self.checkout_time_max = 0.0
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_name, check_same_thread=False)
+        try:
+            im.apply_storage_profile(conn, self.profile)
+            if not self._schema_checked:
+                # First connection of the pool upgrades a database from an older release
+                im.create_inv_tables(metrics.new_cursor(conn))
+                self._schema_checked = True
+            if self.on_connect is not None:
+                self.on_connect(conn)
+        except BaseException:
+            conn.close()
+            raise
+        logger.debug("Pool opened new connection to '%s'.", self.db_name)
+        return conn
+
+    def _discard(self, conn):
+        # Caller holds self._cond
+        self._size -= 1
+        self.discarded += 1
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def _prune_idle(self, now):
+        # Caller holds self._cond. _idle is ordered by return time, so expired entries are at the front
+        if self.idle_timeout is None:
+            return
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            conn, _ = self._idle.pop(0)
+            self._discard(conn)
+
+    def _is_healthy(self, conn):
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error as e:
+            logger.warning("Pooled connection to '%s' failed health check: %s", self.db_name, e)
+            return False
+
+    def checkout(self, timeout=None):
+        """Borrow a connection from the pool, blocking while the pool is exhausted."""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        started = time.perf_counter()
+        deadline = time.monotonic() + timeout
+        conn = None
+        waited = False
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Connection pool for '%s' is closed." % self.db_name)
+                now = time.monotonic()
+                self._prune_idle(now)
+                if self._idle:
+                    # Most recently returned: the one least likely to have gone stale
+                    conn, _ = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    # Reserve the slot now, connect outside the lock
+                    self._size += 1
+                    break
+                remaining = deadline - now
+                if remaining <= 0:
+                    raise PoolTimeout("Timed out waiting for a connection to '%s'." % self.db_name)
+                if not waited:
+                    waited = True
+                    self.waits += 1
+                self._cond.wait(remaining)
+
+        if conn is not None and self.health_check and not self._is_healthy(conn):
+            # Keep the slot reserved for the replacement connection
+            with self._cond:
+                self._discard(conn)
+                self._size += 1
+            conn = None
+
+        if conn is None:
+            try:
+                conn = self._connect()
+            except BaseException:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self.created += 1
+
+        elapsed = time.perf_counter() - started
+        with self._cond:
+            self.checkouts += 1
+            self.checkout_time_total += elapsed
+            if elapsed > self.checkout_time_max:
+                self.checkout_time_max = elapsed
+        return conn
+
+    def checkin(self, conn):
+        """Return a connection to the pool. Any open transaction is rolled back."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            healthy = True
+        except sqlite3.Error:
+            healthy = False
+        im.transaction_finished(conn)
+
+        with self._cond:
+            if self._closed or not healthy:
+                self._discard(conn)
+            else:
+                now = time.monotonic()
+                self._idle.append((conn, now))
+                self._prune_idle(now)
+            self._cond.notify()
+
+    def close(self):
+        """Close idle connections; connections still checked out are closed on checkin."""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._discard(conn)
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "db_name": self.db_name,
+                "size": self._size,
+                "idle": len(self._idle),
+                "max_size": self.max_size,
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "created": self.created,
+                "discarded": self.discarded,
+                "checkout_time_total": self.checkout_time_total,
+                "checkout_time_max": self.checkout_time_max,
+                "checkout_time_avg": self.checkout_time_total / self.checkouts if self.checkouts else 0.0,
+            }
+
+    @contextmanager
+    def connection(self):
+        conn = self.checkout()
+        try:
+            yield conn
+        finally:
+            self.checkin(conn)
+
+
+# Pools keyed by database path
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _pool_options(pool):
+    return {"max_size": pool.max_size, "idle_timeout": pool.idle_timeout, "health_check": pool.health_check,
+            "checkout_timeout": pool.checkout_timeout, "on_connect": pool.on_connect, "profile": pool.profile}
+
+
+def get_pool(db_name, **options):
+    """Return the shared pool for `db_name`, creating it with `options` on first use.
+
+    Raises ValueError when `options` conflict with those of the existing pool; pass no
+    options to get whatever pool exists.
+    """
+    with _pools_lock:
+        pool = _pools.get(db_name)
+        if pool is None or pool._closed:
+            pool = ConnectionPool(db_name, **options)
+            _pools[db_name] = pool
+            return pool
+    current = _pool_options(pool)
+    unknown = options.keys() - current.keys()
+    if unknown:
+        raise TypeError("unexpected pool option(s): %s" % ", ".join(sorted(unknown)))
+    conflicts = sorted(key for key, value in options.items() if current[key] != value)
+    if conflicts:
+        raise ValueError("Pool for '%s' already exists with different %s; close it first (close_all_pools)"
+                         % (db_name, ", ".join("%s=%r" % (key, current[key]) for key in conflicts)))
+    return pool
+
+
+def close_all_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+
+@contextmanager
+def pooled_db_session(db_name, **pool_options):
+    """Pooled equivalent of inventory_manager.managed_db_session.
+
+    Yields a cursor, commits on success and rolls back on any error, then
+    returns the connection to the pool instead of closing it.
+    """
+    pool = get_pool(db_name, **pool_options)
+    conn = pool.checkout()
+    try:
+        cursor = metrics.new_cursor(conn)
+        yield cursor
+        conn.commit()
+    except Exception as e:
+        logger.error("Error during pooled session on %s: %s.", db_name, e, exc_info=True)
+        logger.error("Database rollback commenced.")
+        conn.rollback()
+        raise
+    finally:
+        pool.checkin(conn)
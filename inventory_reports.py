@@ -0,0 +1,147 @@
+# inventory_reports.py - aggregate analytics computed in SQL
+
+import sqlite3, logging
+from collections import namedtuple
+
+import inventory_manager as im
+
+# Get logger
+logger = logging.getLogger("InventoryApp.reports")
+
+# namedtuples for report rows
+Valuation = namedtuple('Valuation', "sku_count total_units total_value")
+PriceBin = namedtuple('PriceBin', "low high items")
+ItemValue = namedtuple('ItemValue', "item value")
+
+
+# Result of verify_inventory_summary: stored totals, totals from a full scan, and whether they differ
+SummaryCheck = namedtuple('SummaryCheck', "stored actual drift")
+
+
+def _scan_valuation(cursor):
+    cursor.execute("""
+        SELECT COUNT(*), COALESCE(SUM(quantity), 0), COALESCE(SUM(quantity * price), 0.0) FROM inventory
+        """)
+    return Valuation(*cursor.fetchone())
+
+
+def get_inventory_summary(cursor):
+    """O(1) totals from inventory_summary, or None when the summary table is not installed."""
+    try:
+        cursor.execute("SELECT sku_count, total_units, total_value FROM inventory_summary WHERE id = 1")
+    except sqlite3.OperationalError as e:
+        if "no such table" in str(e):
+            return None
+        raise
+    row = cursor.fetchone()
+    return Valuation(*row) if row else None
+
+
+@im.log_db_operation
+def total_valuation(cursor, exact=False):
+    """Number of SKUs, units in stock and stock value (sum of quantity * price).
+
+    Served from inventory_summary when create_inv_tables(summary=True) installed it; pass
+    exact=True to force a full scan.
+    """
+    try:
+        if not exact:
+            summary = get_inventory_summary(cursor)
+            if summary is not None:
+                return summary
+        return _scan_valuation(cursor)
+    except sqlite3.Error as e:
+        logger.error("Database error computing valuation: %s", e, exc_info=True)
+        raise
+
+
+@im.log_db_operation
+def verify_inventory_summary(cursor, rebuild=False, tolerance=1e-9):
+    """Compare inventory_summary with a full scan; with rebuild=True, reset it when they drift.
+
+    Counts must match exactly. total_value is a float running sum, so it may differ from the
+    scan by `tolerance` relative error before it counts as drift.
+    """
+    stored = get_inventory_summary(cursor)
+    if stored is None:
+        raise sqlite3.OperationalError("inventory_summary is not installed; use create_inv_tables(summary=True)")
+    actual = _scan_valuation(cursor)
+    drift = (stored.sku_count != actual.sku_count
+             or stored.total_units != actual.total_units
+             or abs(stored.total_value - actual.total_value) > tolerance * max(1.0, abs(actual.total_value)))
+    if drift:
+        logger.warning("inventory_summary drifted: stored %s, actual %s.", stored, actual)
+        if rebuild:
+            cursor.execute("""
+                UPDATE inventory_summary SET sku_count = ?, total_units = ?, total_value = ? WHERE id = 1
+                """, actual)
+            logger.info("inventory_summary rebuilt from a full scan.")
+    return SummaryCheck(stored, actual, drift)
+
+
+@im.log_db_operation
+def low_stock(cursor, threshold, limit=100):
+    """Items with quantity below `threshold`, lowest first (range scan on idx_inventory_quantity)."""
+    try:
+        cursor.execute("""
+            SELECT id, name, quantity, price FROM inventory
+            WHERE quantity < ? ORDER BY quantity, id LIMIT ?
+            """, (threshold, limit))
+        return [im.InventoryItem(*row) for row in cursor.fetchall()]
+    except sqlite3.Error as e:
+        logger.error("Database error listing low stock: %s", e, exc_info=True)
+        raise
+
+
+@im.log_db_operation
+def price_histogram(cursor, bins=10):
+    """Item counts per price band.
+
+    `bins` is a number of equal-width bands between the lowest and highest price, or an
+    ascending list of band edges. Bands are [low, high) except the last, which includes high.
+    Only idx_inventory_price is read, never the table itself.
+    """
+    try:
+        if isinstance(bins, int):
+            if bins < 1:
+                raise ValueError("bins must be at least 1")
+            # MIN/MAX of an indexed column are single index seeks
+            cursor.execute("SELECT MIN(price), MAX(price) FROM inventory")
+            low, high = cursor.fetchone()
+            if low is None:
+                return []
+            if low == high:
+                edges = [low, high]
+            else:
+                width = (high - low) / bins
+                edges = [low + width * i for i in range(bins)] + [high]
+        else:
+            edges = list(bins)
+            if len(edges) < 2 or edges != sorted(edges):
+                raise ValueError("bin edges must be an ascending list of at least two values")
+
+        # One covering range count per band: no table reads and no GROUP BY sort
+        histogram = []
+        for i, (band_low, band_high) in enumerate(zip(edges, edges[1:])):
+            upper = "<=" if i == len(edges) - 2 else "<"
+            cursor.execute("SELECT COUNT(*) FROM inventory WHERE price >= ? AND price %s ?" % upper,
+                           (band_low, band_high))
+            histogram.append(PriceBin(band_low, band_high, cursor.fetchone()[0]))
+        return histogram
+    except sqlite3.Error as e:
+        logger.error("Database error computing price histogram: %s", e, exc_info=True)
+        raise
+
+
+@im.log_db_operation
+def top_by_value(cursor, n=10):
+    """The `n` items with the highest stock value, read from idx_inventory_value."""
+    try:
+        cursor.execute("""
+            SELECT id, name, quantity, price, quantity * price FROM inventory
+            ORDER BY quantity * price DESC LIMIT ?
+            """, (n,))
+        return [ItemValue(im.InventoryItem(*row[:4]), row[4]) for row in cursor.fetchall()]
+    except sqlite3.Error as e:
+        logger.error("Database error listing top items by value: %s", e, exc_info=True)
+        raise
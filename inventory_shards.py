@@ -0,0 +1,317 @@
+# inventory_shards.py - inventory spread across several SQLite files behind one API
+
+import sqlite3, heapq, itertools, os, threading, zlib, logging
+from concurrent.futures import ThreadPoolExecutor
+
+import inventory_manager as im
+import inventory_metrics as metrics
+import inventory_reports as reports
+from inventory_pool import ConnectionPool
+
+# Get logger
+logger = logging.getLogger("InventoryApp.shards")
+
+DEFAULT_MOVE_CHUNK = 50000
+
+
+def shard_for_id(item_id, shard_count):
+    # Ids are allocated so that id % shard_count is the shard holding the item
+    return item_id % shard_count
+
+
+def shard_for_warehouse(warehouse, shard_count):
+    # Stable across processes and Python versions, unlike hash()
+    return zlib.crc32(str(warehouse).encode("utf-8")) % shard_count
+
+
+def _shard_layout(cursor):
+    # (key, shard, shard_count) recorded in a shard file, or None for a file not yet part of a store
+    cursor.execute("CREATE TABLE IF NOT EXISTS inventory_shard (key TEXT NOT NULL, shard INTEGER NOT NULL, "
+                   "shard_count INTEGER NOT NULL)")
+    cursor.execute("SELECT key, shard, shard_count FROM inventory_shard")
+    return cursor.fetchone()
+
+
+def _set_shard_layout(cursor, key, shard, shard_count):
+    cursor.execute("DELETE FROM inventory_shard")
+    cursor.execute("INSERT INTO inventory_shard (key, shard, shard_count) VALUES (?, ?, ?)", (key, shard, shard_count))
+
+
+def _next_id(cursor, shard, shard_count):
+    # Smallest id above every id this shard ever handed out that maps back to this shard
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'inventory'")
+    row = cursor.fetchone()
+    candidate = (row[0] if row else 0) + 1
+    return candidate + (shard - candidate) % shard_count
+
+
+class ShardedInventory:
+    """The inventory_manager CRUD API over N database files, each with its own write lock.
+
+    Every id is globally unique without a central allocator: shard i only assigns ids with
+    id % N == i, so any id routes straight to its shard. New items go to shards round-robin
+    (key="id") or, with key="warehouse", to the shard chosen by hashing the warehouse passed
+    to add_item. Reads over all shards run in parallel, one thread per shard.
+
+    Each file records its place in the store (key, shard index, shard count), so reopening
+    with the paths in another order, a different count or another key raises ValueError.
+    """
+
+    def __init__(self, paths, key="id", profile="throughput", connections_per_shard=4):
+        if not paths:
+            raise ValueError("at least one shard path is required")
+        if key not in ("id", "warehouse"):
+            raise ValueError("key must be 'id' or 'warehouse'")
+        self.paths = list(paths)
+        self.key = key
+        self._pools = [ConnectionPool(path, max_size=connections_per_shard, profile=profile) for path in self.paths]
+        self._executor = ThreadPoolExecutor(max_workers=len(self.paths), thread_name_prefix="inventory-shard")
+        self._round_robin = itertools.count()
+        self._round_robin_lock = threading.Lock()
+        try:
+            self._scatter(im.create_inv_tables)
+            for shard in range(self.shard_count):
+                self._run(shard, self._claim_shard, shard)
+        except BaseException:
+            self.close()
+            raise
+
+    def _claim_shard(self, cursor, shard):
+        layout = _shard_layout(cursor)
+        expected = (self.key, shard, self.shard_count)
+        if layout is None:
+            _set_shard_layout(cursor, *expected)
+        elif tuple(layout) != expected:
+            key, index, count = layout
+            raise ValueError("'%s' is shard %s of %s keyed by %s, not shard %s of %s keyed by %s"
+                             % (self.paths[shard], index, count, key, shard, self.shard_count, self.key))
+
+    @property
+    def shard_count(self):
+        return len(self.paths)
+
+    # --- Plumbing ---
+
+    def _run(self, shard, func, *args, **kwargs):
+        # func(cursor, ...) on one shard in its own transaction
+        with self._pools[shard].connection() as conn:
+            try:
+                result = func(metrics.new_cursor(conn), *args, **kwargs)
+                conn.commit()
+                return result
+            except Exception:
+                conn.rollback()
+                raise
+
+    def _scatter(self, func, *args, **kwargs):
+        # func on every shard in parallel; results in shard order
+        futures = [self._executor.submit(self._run, shard, func, *args, **kwargs)
+                   for shard in range(self.shard_count)]
+        return [future.result() for future in futures]
+
+    def _route(self, item_id):
+        return shard_for_id(item_id, self.shard_count)
+
+    # --- CRUD ---
+
+    def add_item(self, name, quantity, price, warehouse=None):
+        """Insert an item and return its globally unique id."""
+        if self.key == "warehouse":
+            if warehouse is None:
+                raise ValueError("warehouse is required when sharding by warehouse")
+            shard = shard_for_warehouse(warehouse, self.shard_count)
+        else:
+            with self._round_robin_lock:
+                shard = next(self._round_robin) % self.shard_count
+
+        def insert(cursor):
+            # IMMEDIATE takes the write lock before reading the sequence, so the id cannot race
+            cursor.execute("BEGIN IMMEDIATE")
+            item_id = _next_id(cursor, shard, self.shard_count)
+            cursor.execute("INSERT INTO inventory (id, name, quantity, price) VALUES (?, ?, ?, ?)",
+                           (item_id, name, quantity, price))
+            return item_id
+
+        item_id = self._run(shard, insert)
+        logger.info("Item '%s' added to shard %s (ID: %s).", name, shard, item_id)
+        return item_id
+
+    def view_item(self, item_id):
+        return self._run(self._route(item_id), im.get_item, item_id)
+
+    def update_inventory(self, item_id, new_qty, new_price):
+        return self._run(self._route(item_id), im.update_inventory, item_id, new_qty, new_price)
+
+    def adjust_quantity(self, item_id, delta, floor=0):
+        return self._run(self._route(item_id), im.adjust_quantity, item_id, delta, floor)
+
+    def delete_item(self, item_id):
+        return self._run(self._route(item_id), im.delete_item, item_id)
+
+    # --- Scatter-gather reads ---
+
+    def _fetch_page(self, shard, page_size, after_id):
+        return self._executor.submit(self._run, shard, im.get_inventory_page, page_size, after_id)
+
+    def _shard_pages(self, shard, page_size, future):
+        # Items of one shard starting from the page `future` fetches, prefetching the next page
+        # on the executor while this one is consumed
+        while True:
+            page = future.result()
+            if len(page) == page_size:
+                future = self._fetch_page(shard, page_size, page[-1].id)
+            yield from page
+            if len(page) < page_size:
+                return
+
+    def iter_inventory(self, page_size=im.DEFAULT_PAGE_SIZE):
+        """All items from all shards in global id order."""
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+        # First pages are requested from every shard at once; heapq.merge would otherwise
+        # start the generators, and so fetch those pages, one shard after another
+        first_pages = [self._fetch_page(shard, page_size, None) for shard in range(self.shard_count)]
+        return heapq.merge(*(self._shard_pages(shard, page_size, first_pages[shard])
+                             for shard in range(self.shard_count)),
+                           key=lambda item: item.id)
+
+    def total_valuation(self):
+        parts = self._scatter(reports.total_valuation)
+        return reports.Valuation(*(sum(values) for values in zip(*parts)))
+
+    def low_stock(self, threshold, limit=100):
+        parts = self._scatter(reports.low_stock, threshold, limit)
+        return heapq.nsmallest(limit, itertools.chain(*parts), key=lambda item: (item.quantity, item.id))
+
+    def top_by_value(self, n=10):
+        parts = self._scatter(reports.top_by_value, n)
+        return heapq.nlargest(n, itertools.chain(*parts), key=lambda entry: entry.value)
+
+    def price_histogram(self, bins=10):
+        if isinstance(bins, int):
+            # Equal-width bands need the global price range first
+            def price_range(cursor):
+                cursor.execute("SELECT MIN(price), MAX(price) FROM inventory")
+                return cursor.fetchone()
+            ranges = [r for r in self._scatter(price_range) if r[0] is not None]
+            if not ranges:
+                return []
+            low, high = min(r[0] for r in ranges), max(r[1] for r in ranges)
+            if low == high:
+                bins = [low, high]
+            else:
+                width = (high - low) / bins
+                bins = [low + width * i for i in range(bins)] + [high]
+        parts = self._scatter(reports.price_histogram, bins)
+        return [reports.PriceBin(band[0].low, band[0].high, sum(b.items for b in band)) for band in zip(*parts)]
+
+    def stats(self):
+        return [pool.stats() for pool in self._pools]
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        for pool in self._pools:
+            pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def rebalance_shards(old_paths, new_paths, chunk_size=DEFAULT_MOVE_CHUNK):
+    """Move items so that every item lives in new_paths[id % len(new_paths)].
+
+    Paths may overlap between the layouts (e.g. growing from 2 to 4 shards keeps the first
+    two files). Rows move in id-range chunks with INSERT OR REPLACE followed by DELETE; each
+    chunk commits on its own, and running the rebalance again after an interruption finishes
+    the job. Run it while no writers are active. Returns the number of rows moved.
+
+    Only id-keyed stores can be rebalanced. A warehouse-keyed store places items by a
+    warehouse that is not stored with them, and moving them by id would break that placement,
+    so it raises ValueError. A new path that is not in old_paths must be a new or empty file;
+    one that already belongs to a store or holds items also raises ValueError.
+    """
+    new_count = len(new_paths)
+    for path in old_paths:
+        if not os.path.exists(path):
+            raise ValueError("shard '%s' does not exist" % path)
+        with im.managed_db_session(path) as cursor:
+            layout = _shard_layout(cursor)
+        if layout is not None and layout[0] != "id":
+            raise ValueError("'%s' belongs to a store keyed by %s; only id-keyed stores can be rebalanced"
+                             % (path, layout[0]))
+    added = [(index, path) for index, path in enumerate(new_paths) if path not in old_paths]
+    for index, path in added:
+        if not os.path.exists(path):
+            continue
+        with im.managed_db_session(path) as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' "
+                           "AND name IN ('inventory', 'inventory_shard')")
+            tables = {row[0] for row in cursor.fetchall()}
+            layout = _shard_layout(cursor) if "inventory_shard" in tables else None
+            has_items = "inventory" in tables and cursor.execute("SELECT 1 FROM inventory LIMIT 1").fetchone()
+        # The layout recorded below by an interrupted run of this same rebalance is the only one accepted
+        if layout is not None and tuple(layout) != ("id", index, new_count):
+            key, shard, count = layout
+            raise ValueError("'%s' is already shard %s of %s keyed by %s; rebalance into a new or empty file"
+                             % (path, shard, count, key))
+        if layout is None and has_items:
+            raise ValueError("'%s' already holds items; rebalance into a new or empty file" % path)
+    for path in new_paths:
+        with im.managed_db_session(path) as cursor:
+            im.create_inv_tables(cursor)
+    # Claim the added files before moving rows into them, so a rerun after an interruption
+    # tells its own partly filled targets from files in use elsewhere
+    for index, path in added:
+        with im.managed_db_session(path) as cursor:
+            _shard_layout(cursor)
+            _set_shard_layout(cursor, "id", index, new_count)
+
+    moved = 0
+    for source in dict.fromkeys(old_paths):
+        conn = sqlite3.connect(source)
+        try:
+            with conn:
+                im.create_inv_tables(metrics.new_cursor(conn))
+            low, high = conn.execute("SELECT MIN(id), MAX(id) FROM inventory").fetchone()
+            if low is None:
+                continue
+            for target_index, target in enumerate(new_paths):
+                if target == source:
+                    continue
+                conn.execute("ATTACH DATABASE ? AS target", (target,))
+                try:
+                    start = low - 1
+                    while start < high:
+                        end = start + chunk_size
+                        params = (start, end, new_count, target_index)
+                        with conn:
+                            conn.execute("""
+                                INSERT OR REPLACE INTO target.inventory (id, name, quantity, price, version)
+                                SELECT id, name, quantity, price, version FROM main.inventory
+                                WHERE id > ? AND id <= ? AND id % ? = ?
+                                """, params)
+                            cursor = conn.execute("""
+                                DELETE FROM main.inventory WHERE id > ? AND id <= ? AND id % ? = ?
+                                """, params)
+                            moved += cursor.rowcount
+                        start = end
+                finally:
+                    conn.execute("DETACH DATABASE target")
+        finally:
+            conn.close()
+
+    # Record the new layout; old files left out of it are now empty and no longer shards
+    for path in old_paths:
+        if path not in new_paths:
+            with im.managed_db_session(path) as cursor:
+                _shard_layout(cursor)
+                cursor.execute("DELETE FROM inventory_shard")
+    for index, path in enumerate(new_paths):
+        with im.managed_db_session(path) as cursor:
+            _shard_layout(cursor)
+            _set_shard_layout(cursor, "id", index, new_count)
+    logger.info("Rebalanced %s shard(s) into %s: %s rows moved.", len(old_paths), new_count, moved)
+    return moved
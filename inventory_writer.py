@@ -0,0 +1,257 @@
+# inventory_writer.py - single-writer group commit queue for inventory_manager
+
+import sqlite3, threading, queue, time, logging
+from concurrent.futures import Future
+
+import inventory_manager as im
+import inventory_metrics as metrics
+
+# Get logger
+logger = logging.getLogger("InventoryApp.writer")
+
+# Sentinel telling the writer thread to flush and exit
+_STOP = object()
+
+# How often a producer blocked on a full queue checks whether the writer was closed
+_PUT_POLL_INTERVAL = 0.1
+
+
+class _WriterConnection(sqlite3.Connection):
+    # Operations run inside the writer's group transaction and must not end it themselves
+    in_group = False
+
+    def commit(self):
+        if self.in_group:
+            raise sqlite3.ProgrammingError("operations queued on GroupCommitWriter must not commit; "
+                                           "the writer commits the whole group")
+        super().commit()
+
+    def rollback(self):
+        if self.in_group:
+            raise sqlite3.ProgrammingError("operations queued on GroupCommitWriter must not roll back; "
+                                           "raise an exception to undo the operation")
+        super().rollback()
+
+
+class GroupCommitWriter:
+    """Funnels writes from many threads through one connection and one writer thread.
+
+    Operations are queued and executed in groups: the writer takes everything that
+    arrives within `max_delay` seconds (up to `max_batch` operations) and runs it in a
+    single transaction, so a whole group pays for one commit/fsync and producers never
+    contend for SQLite's write lock. Each operation runs inside its own savepoint, so a
+    failing operation is rolled back alone and only its future receives the exception.
+    Futures resolve after the group has been committed.
+    """
+
+    def __init__(self, db_name, max_batch=1000, max_delay=0.005, profile="throughput", max_queue=100000):
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        self.db_name = db_name
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.profile = profile
+        self._queue = queue.Queue(max_queue)
+        self._closed = False
+        self._putting = 0       # producers admitted by submit() whose put has not returned yet
+        self._close_cond = threading.Condition()
+
+        # Counters
+        self.batches = 0
+        self.operations = 0
+        self.failed_commits = 0
+
+        # Connect up front so a bad path or profile fails in the caller's thread
+        self._conn = sqlite3.connect(db_name, isolation_level=None, check_same_thread=False,
+                                     factory=_WriterConnection)
+        try:
+            im.apply_storage_profile(self._conn, profile)
+            # Queued operations may touch columns added by later schema versions
+            im.create_inv_tables(metrics.new_cursor(self._conn))
+        except BaseException:
+            self._conn.close()
+            raise
+        self._thread = threading.Thread(target=self._run, name="inventory-writer", daemon=True)
+        self._thread.start()
+
+    # --- Producer API ---
+
+    def submit(self, func, *args, **kwargs):
+        """Queue func(cursor, *args, **kwargs) and return a Future for its result.
+
+        `func` runs inside the writer's transaction and must not commit or roll back; functions
+        that do (such as inventory_manager.add_items) fail with sqlite3.ProgrammingError.
+        """
+        future = Future()
+        with self._close_cond:
+            if self._closed:
+                raise RuntimeError("GroupCommitWriter for '%s' is closed." % self.db_name)
+            self._putting += 1
+        try:
+            # Not under the lock: blocking there on a full queue would stall close() and the
+            # writer's crash handler. close() waits for admitted producers before queueing the
+            # stop sentinel, so nothing lands behind it.
+            while True:
+                try:
+                    self._queue.put((future, func, args, kwargs), timeout=_PUT_POLL_INTERVAL)
+                    return future
+                except queue.Full:
+                    if self._closed:
+                        raise RuntimeError("GroupCommitWriter for '%s' is closed." % self.db_name) from None
+        finally:
+            with self._close_cond:
+                self._putting -= 1
+                self._close_cond.notify_all()
+
+    def add_item(self, name, quantity, price):
+        return self.submit(im.add_item, name, quantity, price)
+
+    def update_inventory(self, item_id, new_qty, new_price):
+        return self.submit(im.update_inventory, item_id, new_qty, new_price)
+
+    def adjust(self, item_id, delta, floor=0):
+        return self.submit(im.adjust_quantity, item_id, delta, floor)
+
+    def delete_item(self, item_id):
+        return self.submit(im.delete_item, item_id)
+
+    def close(self, timeout=None):
+        """Flush queued operations, stop the writer thread and close the connection."""
+        with self._close_cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._close_cond.wait_for(lambda: not self._putting)
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def stats(self):
+        return {
+            "db_name": self.db_name,
+            "batches": self.batches,
+            "operations": self.operations,
+            "avg_batch": self.operations / self.batches if self.batches else 0.0,
+            "failed_commits": self.failed_commits,
+            "queued": self._queue.qsize(),
+        }
+
+    # --- Writer thread ---
+
+    def _collect(self, batch):
+        # Fill a group: whatever arrives within max_delay of the first op, up to max_batch.
+        # Appends to `batch` in place so a crash still knows which ops were taken off the queue.
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                op = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if op is _STOP:
+                return True
+            batch.append(op)
+        return False
+
+    def _run(self):
+        batch = []
+        try:
+            stopping = False
+            while not stopping:
+                op = self._queue.get()
+                if op is _STOP:
+                    break
+                batch = [op]
+                stopping = self._collect(batch)
+                self._run_batch(batch)
+                batch = []
+        except BaseException as e:
+            logger.error("Writer for '%s' stopped unexpectedly: %s", self.db_name, e, exc_info=True)
+            with self._close_cond:
+                self._closed = True
+            self._fail(batch, e)
+        finally:
+            with self._close_cond:
+                # Producers still in submit() finish their put or give up now that _closed is set
+                self._close_cond.wait_for(lambda: not self._putting)
+            self._fail_queued(RuntimeError("GroupCommitWriter for '%s' stopped before running the operation."
+                                           % self.db_name))
+            self._conn.close()
+            logger.debug("Writer for '%s' stopped.", self.db_name)
+
+    def _fail_queued(self, error):
+        # Nothing can be queued once _closed is set and no producer is mid-put, so draining here
+        # leaves no future behind
+        while True:
+            try:
+                op = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if op is not _STOP:
+                self._fail((op,), error)
+
+    @staticmethod
+    def _fail(batch, error):
+        for future, _, _, _ in batch:
+            if future.done():
+                continue
+            if future.running() or future.set_running_or_notify_cancel():
+                future.set_exception(error)
+
+    def _run_op(self, cursor, func, args, kwargs):
+        # One operation in its own savepoint; returns (result, error)
+        cursor.execute("SAVEPOINT op")
+        self._conn.in_group = True
+        try:
+            result = func(cursor, *args, **kwargs)
+        except Exception as e:
+            if self._conn.in_transaction:
+                cursor.execute("ROLLBACK TO op")
+                cursor.execute("RELEASE op")
+            return None, e
+        finally:
+            self._conn.in_group = False
+        if self._conn.in_transaction:
+            cursor.execute("RELEASE op")
+        return result, None
+
+    def _run_batch(self, batch):
+        cursor = metrics.new_cursor(self._conn)
+        outcomes = []
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            for future, func, args, kwargs in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                result, error = self._run_op(cursor, func, args, kwargs)
+                outcomes.append((future, result, error))
+                if not self._conn.in_transaction:
+                    # The operation ended the transaction with raw SQL: what ran so far is committed
+                    # (or rolled back, which only the operation itself can report)
+                    logger.warning("Operation %s ended the writer's transaction on '%s'.",
+                                   getattr(func, "__name__", func), self.db_name)
+                    cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("COMMIT")
+        except Exception as e:
+            # The group as a whole failed (lock timeout, disk full...): every caller gets the error
+            logger.error("Group commit of %s operations on '%s' failed: %s", len(batch), self.db_name, e, exc_info=True)
+            self.failed_commits += 1
+            if self._conn.in_transaction:
+                self._conn.rollback()
+            im.transaction_finished(self._conn)
+            self._fail(batch, e)
+            return
+
+        im.transaction_finished(self._conn)
+        self.batches += 1
+        self.operations += len(outcomes)
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
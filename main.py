@@ -2,37 +2,44 @@
 # inventory_manager.py version 2 (main.py test program)
 
 import inventory_manager as im
-import os, platform, logging
+import os, sys, platform, logging
 
 # --- Setup logger ---
 logger = logging.getLogger("InventoryApp")
-logger.setLevel(logging.DEBUG)
-logger.propagate = True
 
-log_formatter = logging.Formatter(
-    '%(asctime)s [%(name)-25s] | [%(levelname)-8s] : %(message)s',
-    datefmt='%I:%M:%S'
-)
+def setup_logging():
+    """Console and file logging for the interactive menu (the CLI configures its own)"""
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = True
 
-console_log = logging.StreamHandler()
-console_log.setLevel(logging.INFO) # INFO, WARNING, ERROR, CRITICAL
-console_log.setFormatter(log_formatter)
-logger.addHandler(console_log)
+    log_formatter = logging.Formatter(
+        '%(asctime)s [%(name)-25s] | [%(levelname)-8s] : %(message)s',
+        datefmt='%I:%M:%S'
+    )
 
-file_log = logging.FileHandler("inventory_manager.log", mode='a')
-file_log.setLevel(logging.DEBUG) # DEBUG, INFO, WARNING, ERROR, CRITICAL
-file_log.setFormatter(log_formatter)
-logger.addHandler(file_log)
+    console_log = logging.StreamHandler()
+    console_log.setLevel(logging.INFO) # INFO, WARNING, ERROR, CRITICAL
+    console_log.setFormatter(log_formatter)
+    logger.addHandler(console_log)
+
+    file_log = logging.FileHandler("inventory_manager.log", mode='a')
+    file_log.setLevel(logging.DEBUG) # DEBUG, INFO, WARNING, ERROR, CRITICAL
+    file_log.setFormatter(log_formatter)
+    logger.addHandler(file_log)
 # --- End logger setup ---
 
 def clear_terminal():
     """Clears the terminal screen"""
+    # Nothing to clear when output is piped
+    if not sys.stdout.isatty():
+        return
     # Windows
     if platform.system() == "Windows":
         os.system('cls')
-    # Linux & macOS
+    # Linux & macOS: ANSI escape instead of spawning `clear`
     else:
-        os.system('clear')
+        sys.stdout.write("\033[2J\033[H")
+        sys.stdout.flush()
         
 def main():    
     print("*** inventory_manager.py Test Program ***\n")
@@ -127,6 +134,11 @@ def main():
                 logger.error("Please enter a valid input.")
         
 if __name__ == "__main__":
+    # With arguments, run the non-interactive CLI (see inventory_cli.py) instead of the menu
+    if len(sys.argv) > 1:
+        import inventory_cli
+        sys.exit(inventory_cli.main(sys.argv[1:]))
+    setup_logging()
     main()
     
 
@@ -0,0 +1,50 @@
+# test_inventory_indexes.py - name lookups must be served by idx_inventory_name_nocase
+# Run with: python -m unittest test_inventory_indexes
+
+import sqlite3, unittest
+
+import inventory_manager as im
+
+
+class NameIndexPlanTest(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.cursor = self.conn.cursor()
+        im.create_inv_tables(self.cursor)
+        im.add_items(self.cursor, (("Item %d" % i, i, 1.0) for i in range(200)))
+        self.conn.execute("ANALYZE")
+
+    def tearDown(self):
+        self.conn.close()
+
+    def _plans(self, operation, *args):
+        # EXPLAIN QUERY PLAN for every SELECT the operation actually ran (parameters expanded)
+        statements = []
+        self.conn.set_trace_callback(statements.append)
+        try:
+            operation(self.cursor, *args)
+        finally:
+            self.conn.set_trace_callback(None)
+        selects = [sql for sql in statements if sql.lstrip().upper().startswith("SELECT")]
+        self.assertTrue(selects, "%s ran no SELECT" % operation.__name__)
+        return [" | ".join(row[3] for row in self.conn.execute("EXPLAIN QUERY PLAN " + sql)) for sql in selects]
+
+    def assertUsesNameIndex(self, operation, *args):
+        # A SEARCH is a range/equality lookup; "SCAN inventory" would mean reading every row
+        for plan in self._plans(operation, *args):
+            self.assertIn("SEARCH inventory USING INDEX idx_inventory_name_nocase", plan)
+
+    def test_find_by_name_uses_index(self):
+        self.assertUsesNameIndex(im.find_by_name, "item 42")
+
+    def test_search_prefix_uses_index(self):
+        self.assertUsesNameIndex(im.search_prefix, "item 1")
+
+    def test_lookups_return_matches(self):
+        self.assertEqual([item.id for item in im.find_by_name(self.cursor, "ITEM 42")], [43])
+        self.assertEqual(len(im.search_prefix(self.cursor, "item 19", limit=100)), 11)
+
+
+if __name__ == "__main__":
+    unittest.main()
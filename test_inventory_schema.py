@@ -0,0 +1,74 @@
+# test_inventory_schema.py - databases created before the schema migrations must keep working
+# Run with: python -m unittest test_inventory_schema
+
+import contextlib, io, json, os, shutil, sqlite3, tempfile, unittest
+
+import inventory_cli
+import inventory_manager as im
+from inventory_pool import ConnectionPool
+from inventory_writer import GroupCommitWriter
+
+
+class PreSeriesSchemaTest(unittest.TestCase):
+    """Every entry point upgrades a database created by the original create_inv_tables."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.db = os.path.join(self.directory, "old.db")
+        conn = sqlite3.connect(self.db)
+        # Schema and data as written before migrations existed: no version column, user_version 0
+        conn.execute("""
+            CREATE TABLE inventory (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                quantity INTEGER NOT NULL DEFAULT 0,
+                price REAL NOT NULL DEFAULT 0.0
+            )
+        """)
+        conn.executemany("INSERT INTO inventory (name, quantity, price) VALUES (?, ?, ?)",
+                         [("Widget", 10, 1.5), ("Gadget", 20, 2.5)])
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def assertUpgraded(self):
+        conn = sqlite3.connect(self.db)
+        try:
+            self.assertEqual(conn.execute("PRAGMA user_version").fetchone()[0], im.LATEST_SCHEMA_VERSION)
+        finally:
+            conn.close()
+
+    def test_cli_update(self):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            code = inventory_cli.main(["--db", self.db, "--json", "update", "1", "5", "2.0"])
+        self.assertEqual(code, 0)
+        self.assertEqual(json.loads(out.getvalue()), {"id": 1, "updated": True})
+        self.assertUpgraded()
+
+    def test_pool_adjust_and_update_items(self):
+        pool = ConnectionPool(self.db)
+        try:
+            with pool.connection() as conn:
+                cursor = conn.cursor()
+                self.assertEqual(im.adjust_quantity(cursor, 1, -3), 7)
+                self.assertEqual(im.update_items(cursor, [(2, 1, 9.0), (99, 1, 1.0)]), im.BatchResult(1, [99]))
+                conn.commit()
+                self.assertEqual(im.get_item_versioned(cursor, 2).version, 2)
+        finally:
+            pool.close()
+        self.assertUpgraded()
+
+    def test_writer_update(self):
+        writer = GroupCommitWriter(self.db)
+        try:
+            self.assertTrue(writer.submit(im.update_inventory, 1, 4, 3.0).result(timeout=10))
+        finally:
+            writer.close()
+        self.assertUpgraded()
+
+
+if __name__ == "__main__":
+    unittest.main()